@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+
+from ise_settings import applySettings, loadSettings, SETTINGS_FILE
+from ise_utils import getDriver, iseLogin, iseLogout, isePostLoginPopUps, LOGGER
+from ise_session import acquireDriver, releaseDriver
+#
+from datetime import datetime
+import argparse
+import json
+import os
+
+def main(argv=None):
+
+    # process arguments, failover to environment variables
+    parser = argparse.ArgumentParser(description="Converge ISE admin UI settings declared in a JSON file in a single browser session")
+    parser.add_argument("--host", type=str, default=os.getenv("ISE_HOST", ""), help="Cisco ISE hostname or IP address (env ISE_HOST) (required)")
+    parser.add_argument("--username", type=str, default=os.getenv("ISE_USERNAME", ""), help="Cisco ISE username (env ISE_USERNAME) (required)")
+    parser.add_argument("--password", type=str, default=os.getenv("ISE_PASSWORD", ""), help="Cisco ISE password (env ISE_PASSWORD) (required)")
+    parser.add_argument("--settings", type=str, default=os.getenv("ISE_SETTINGS_FILE", SETTINGS_FILE), help="JSON file with the desired settings (env ISE_SETTINGS_FILE)")
+    parser.add_argument("--check", action="store_true", default=os.getenv("ISE_SETTINGS_CHECK", "").lower() == "true", help="Only read the current state and report drift, change nothing, exit 2 on drift (env ISE_SETTINGS_CHECK)")
+    parser.add_argument("--report", type=str, default=os.getenv("ISE_SETTINGS_REPORT", ""), help="Write the per-setting results as JSON to this file (env ISE_SETTINGS_REPORT)")
+    parser.add_argument("--reuse-session", action="store_true", default=os.getenv("ISE_REUSE_SESSION", "").lower() == "true", help="Take a warm logged-in browser from the session pool and keep it there for the next script (env ISE_REUSE_SESSION)")
+    args = parser.parse_args(argv)
+    host = args.host
+    username = args.username
+    password = args.password
+    reuse_session = args.reuse_session
+
+    if not host or not username or not password:
+        parser.print_help()
+        exit(1)
+
+    settings = loadSettings(args.settings)
+    baseUrl = f"https://{host}/admin"
+    driver = None
+    changed = []
+    try:
+        if reuse_session:
+            driver = acquireDriver(host, username, password)
+        else:
+            driver = getDriver(url=f"{baseUrl}/login.jsp")
+            # Login
+            iseLogin(driver, username, password, timeout=60)
+            isePostLoginPopUps(driver)
+        #
+
+        results = applySettings(driver, baseUrl, settings, check_mode=args.check)
+        changed = [result["name"] for result in results if result["changed"]]
+        LOGGER.info(f"{len(settings)} settings checked, {len(changed)} {'drifted' if args.check else 'changed'}{': ' + ', '.join(changed) if changed else ''}.")
+        if args.report:
+            with open(args.report, "w") as f:
+                json.dump({
+                    "host": host,
+                    "check_mode": args.check,
+                    "drift": bool(changed),
+                    "checked_at": datetime.now().isoformat(),
+                    "settings": results,
+                }, f, indent=2)
+
+        # Logout
+        if not reuse_session:
+            iseLogout(driver)
+    finally:
+        if reuse_session:
+            releaseDriver(driver)
+        elif driver:
+            driver.quit()
+
+    # After the browser is released, drift is not a failure of the session
+    if args.check and changed:
+        exit(2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+
+from ise_mock import MockIse, startMockIse
+from ise_utils import LOGGER
+#
+from datetime import datetime
+from statistics import median
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+#
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+MOCK_USERNAME = "admin"
+MOCK_PASSWORD = "Password1"
+MOCK_INITIAL_PASSWORD = "Initial1"
+# Scenario: (entry script, script arguments)
+SCENARIOS = {
+    "reset-password": ("ise-reset-ui-admin-password.py", []),
+    "disable-expiration": ("ise-disable-ui-admin-password-expiration.py", []),
+    "apply-settings": ("ise-apply-settings.py", []),
+    "export-policy-ui": ("ise-export-policy.py", ["--mode", "ui"]),
+    "export-policy-api": ("ise-export-policy.py", ["--mode", "api"]),
+}
+
+def readTrace(path):
+    steps = {}
+    if not os.path.exists(path):
+        return steps
+    with open(path) as f:
+        for line in f:
+            span = json.loads(line)
+            step = steps.setdefault(span["name"], {"count": 0, "ms": 0.0, "commands": 0})
+            step["count"] += 1
+            step["ms"] += span["duration_ms"]
+            step["commands"] += span["commands"]
+    return steps
+
+def runScenario(name, ise, host, work_dir, timeout, profile="full"):
+    script, script_args = SCENARIOS[name]
+    runDir = tempfile.mkdtemp(prefix=f"{name}-", dir=work_dir)
+    env = dict(
+        os.environ,
+        ISE_HOST=host,
+        ISE_USERNAME=MOCK_USERNAME,
+        ISE_PASSWORD=MOCK_PASSWORD,
+        ISE_OLD_PASSWORD=MOCK_INITIAL_PASSWORD,
+        ISE_NEW_PASSWORD=MOCK_PASSWORD,
+        SELENIUM_DOWNLOAD_PATH=runDir,
+        ISE_TRACE_FILE=os.path.join(runDir, "trace.jsonl"),
+        ISE_SESSION_STATE=os.path.join(work_dir, "sessions.json"),
+        ISE_TIMING_STORE=os.path.join(work_dir, "timing"),
+        ISE_LOGIN_CACHE_DIR=os.path.join(work_dir, "logins"),
+        ISE_BROWSER_PROFILE=profile,
+    )
+    ise.password = MOCK_PASSWORD
+    ise.reset(MOCK_INITIAL_PASSWORD if name == "reset-password" else None)
+    start = datetime.now()
+    with open(os.path.join(runDir, "output.log"), "w") as log:
+        # Own process group, a timeout kills the script together with its chromedriver and Chrome
+        process = subprocess.Popen(
+            [sys.executable, os.path.join(SCRIPT_DIR, script)] + script_args,
+            env=env, stdout=log, stderr=subprocess.STDOUT, start_new_session=True
+        )
+        try:
+            returncode = process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                # The whole group exited between the timeout and the kill
+                pass
+            process.wait()
+            returncode = None
+    return {
+        "ok": returncode == 0,
+        "returncode": returncode,
+        "seconds": round((datetime.now() - start).total_seconds(), 3),
+        "requests": ise.requests,
+        "faults": ise.faults,
+        "steps": readTrace(env["ISE_TRACE_FILE"]),
+        "log": os.path.join(runDir, "output.log"),
+    }
+
+def summarizeRuns(runs):
+    passed = [run for run in runs if run["ok"]]
+    steps = {}
+    for run in passed:
+        for step, values in run["steps"].items():
+            steps.setdefault(step, []).append(values)
+    return {
+        "runs": len(runs),
+        "passed": len(passed),
+        "median_seconds": round(median(run["seconds"] for run in passed), 3) if passed else None,
+        "steps": {
+            step: {
+                "median_ms": round(median(value["ms"] for value in values), 1),
+                "median_commands": median(value["commands"] for value in values),
+            }
+            for step, values in sorted(steps.items())
+        },
+    }
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Benchmark the ise01 entry scripts against a local mock of the ISE admin UI")
+    parser.add_argument("--scenarios", type=str, default=",".join(SCENARIOS), help=f"Comma separated scenarios ({', '.join(SCENARIOS)})")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per scenario")
+    parser.add_argument("--timeout", type=int, default=300, help="Seconds after which a run is killed")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds added to every mock response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra seconds added to every mock response")
+    parser.add_argument("--fault-rate", type=float, default=0.0, help="Probability of a mock response failing with HTTP 500")
+    parser.add_argument("--alerts", type=int, default=1, help="Number of xwtAlert pop-ups after login")
+    parser.add_argument("--slides", type=int, default=3, help="Number of ise-modal carousel slides after login")
+    parser.add_argument("--popup-delay", type=float, default=0.5, help="Seconds before each pop-up appears")
+    parser.add_argument("--export-delay", type=float, default=2.0, help="Seconds the policy export download takes")
+    parser.add_argument("--browser-profile", type=str, default=os.getenv("ISE_BROWSER_PROFILE", "full"), choices=["full", "lean"], help="Chrome profile used by the scripts (env ISE_BROWSER_PROFILE)")
+    parser.add_argument("--work-dir", type=str, default="", help="Keep logs, traces and downloads in this directory")
+    parser.add_argument("--report", type=str, default="", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+    scenarios = [scenario.strip() for scenario in args.scenarios.split(",") if scenario.strip()]
+
+    unknown = [scenario for scenario in scenarios if scenario not in SCENARIOS]
+    if unknown or args.repeat < 1:
+        parser.print_help()
+        exit(1)
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="ise-benchmark-")
+    os.makedirs(work_dir, exist_ok=True)
+    ise = MockIse(MOCK_USERNAME, MOCK_PASSWORD, latency=args.latency, jitter=args.jitter, fault_rate=args.fault_rate,
+                  alerts=args.alerts, slides=args.slides, popup_delay=args.popup_delay, export_delay=args.export_delay)
+    server = startMockIse(ise)
+    host = f"127.0.0.1:{server.server_address[1]}"
+    LOGGER.info(f"Mock ISE listening on https://{host}, results in {work_dir}")
+
+    results = {}
+    try:
+        for scenario in scenarios:
+            runs = []
+            for i in range(args.repeat):
+                run = runScenario(scenario, ise, host, work_dir, args.timeout, args.browser_profile)
+                LOGGER.info(f"{scenario} run {i + 1}/{args.repeat}: {'OK' if run['ok'] else 'FAILED'} in {run['seconds']:.2f}s")
+                runs.append(run)
+            results[scenario] = {"summary": summarizeRuns(runs), "runs": runs}
+    finally:
+        server.shutdown()
+
+    for scenario, result in results.items():
+        summary = result["summary"]
+        seconds = f"{summary['median_seconds']:.2f}s" if summary["median_seconds"] is not None else "-"
+        print(f"{scenario:<22} {summary['passed']}/{summary['runs']} passed, median {seconds}")
+        for step, values in summary["steps"].items():
+            print(f"  {step:<20} {values['median_ms']:>10.1f} ms {values['median_commands']:>6} commands")
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(results, f, indent=2)
+    exit(0 if all(result["summary"]["passed"] == result["summary"]["runs"] for result in results.values()) else 1)
+
+if __name__ == "__main__":
+    main()
@@ -4,13 +4,13 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.wait import WebDriverWait
 #
-from ise_utils import getDriver, iseLogin, iseLogout, isePostLoginPopUps, LOGGER, waitForUrl, waitForClick
+from ise_utils import DownloadWatcher, getDownloadPath, getDriver, iseLogin, iseLogout, isePostLoginPopUps, LOGGER, waitForUrl, waitForClick
+from ise_session import acquireDriver, releaseDriver
 #
 import argparse
-from time import sleep
 import os
 
-def main():
+def main(argv=None):
 
     # process arguments, failover to environment variables
     parser = argparse.ArgumentParser()
@@ -18,22 +18,43 @@ def main():
     parser.add_argument("--username", type=str, default=os.getenv("ISE_USERNAME", ""), help="Cisco ISE username (env ISE_USERNAME) (required)")
     parser.add_argument("--password", type=str, default=os.getenv("ISE_PASSWORD", ""), help="Cisco ISE password (env ISE_PASSWORD) (required)")
     parser.add_argument("--download-path", type=str, default=os.getenv("SELENIUM_DOWNLOAD_PATH", ""), help="Selenium download path (env SELENIUM_DOWNLOAD_PATH)")
-    args = parser.parse_args()
+    parser.add_argument("--download-timeout", type=int, default=int(os.getenv("ISE_DOWNLOAD_TIMEOUT", "900")), help="Seconds to wait for the exported file to be downloaded (env ISE_DOWNLOAD_TIMEOUT)")
+    parser.add_argument("--mode", type=str, choices=["ui", "api", "auto"], default=os.getenv("ISE_EXPORT_MODE", "ui"), help="Export through the Admin UI, through ERS/OpenAPI, or through ERS/OpenAPI with UI fallback (env ISE_EXPORT_MODE)")
+    parser.add_argument("--reuse-session", action="store_true", default=os.getenv("ISE_REUSE_SESSION", "").lower() == "true", help="Take a warm logged-in browser from the session pool and keep it there for the next script (env ISE_REUSE_SESSION)")
+    args = parser.parse_args(argv)
     host = args.host
     username = args.username
     password = args.password
-    download_path = args.download_path
+    reuse_session = args.reuse_session
+    download_path = getDownloadPath(args.download_path)
+    download_timeout = args.download_timeout
+    mode = args.mode
 
     if not host or not username or not password:
         parser.print_help()
         exit(1)
 
+    if mode in ("api", "auto"):
+        # Imported lazily, requests is only needed for the API export
+        from ise_api import exportPolicyApi
+        try:
+            exportPolicyApi(host, username, password, f"{download_path}/PolicyConfig.xml")
+            return
+        except Exception as e:
+            if mode == "api":
+                raise
+            LOGGER.warning(f"Policy Export through ERS/OpenAPI failed ({e}), falling back to UI export...")
+
     baseUrl = f"https://{host}/admin"
+    driver = None
     try:
-        driver = getDriver(url=f"{baseUrl}/login.jsp", download_path=download_path)
-        # Login
-        iseLogin(driver, username, password, timeout=60)
-        isePostLoginPopUps(driver)
+        if reuse_session:
+            driver = acquireDriver(host, username, password, download_path=download_path)
+        else:
+            driver = getDriver(url=f"{baseUrl}/login.jsp", download_path=download_path)
+            # Login
+            iseLogin(driver, username, password, timeout=60)
+            isePostLoginPopUps(driver)
         #
 
         # #######################################################################
@@ -50,11 +71,12 @@ def main():
                 EC.element_to_be_clickable((By.ID, "exportPolicy"))
             )
         )
-        # Hide side menu
-        driver.find_element(By.CLASS_NAME, "sidenav-toggler").click()
-        WebDriverWait(driver, 5).until(
-            EC.presence_of_element_located((By.XPATH, "//div[@id='sidenav'][@class='toggled']"))
-        )
+        # Hide side menu, a reused pooled session may have it hidden already
+        if not driver.find_elements(By.XPATH, "//div[@id='sidenav'][@class='toggled']"):
+            driver.find_element(By.CLASS_NAME, "sidenav-toggler").click()
+            WebDriverWait(driver, 5).until(
+                EC.presence_of_element_located((By.XPATH, "//div[@id='sidenav'][@class='toggled']"))
+            )
         # Perform Policy Export
         expNoEncryp = driver.find_element(By.ID, "expNoEncryp") # Uncheck Encryption
         #driver.execute_script("arguments[0].scrollIntoView();", expNoEncryp) # slide into view
@@ -64,23 +86,30 @@ def main():
         driver.execute_script("arguments[0].click();", dwnLclComp)
         # dwnLclComp.click()
         exportPolicyButton = driver.find_element(By.ID, "exportPolicy") # Export Policy
-        for i in range(1, 100):
-            LOGGER.info("Trying to exporting Policy to local file...")
+        # A leftover export would make Chrome save the new one as "PolicyConfig (1).xml"
+        if os.path.exists(f"{download_path}/PolicyConfig.xml"):
+            os.remove(f"{download_path}/PolicyConfig.xml")
+        with DownloadWatcher(download_path, "PolicyConfig.xml") as watcher:
+            LOGGER.info("Exporting Policy to local file...")
             waitForClick(driver, exportPolicyButton)
-            sleep(i*2)
-            if os.path.exists(f"{download_path}/PolicyConfig.xml"):
-                LOGGER.info("Policy Exported to local file")
-                break
+            exported = watcher.wait(timeout=download_timeout)
+        if exported:
+            LOGGER.info("Policy Exported to local file")
         else:
             LOGGER.error("Policy Export to local file failed")
-            iseLogout(driver)
+            if not reuse_session:
+                iseLogout(driver)
             exit(1)
         # #######################################################################
 
         # Logout
-        iseLogout(driver)
+        if not reuse_session:
+            iseLogout(driver)
     finally:
-        driver.quit()
+        if reuse_session:
+            releaseDriver(driver)
+        elif driver:
+            driver.quit()
 
 if __name__ == "__main__":
     main()
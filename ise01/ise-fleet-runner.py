@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+from ise_utils import LOGGER
+#
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+#
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Tasks map to the single-host scripts and their arguments, the scripts read credentials
+# from the environment
+TASKS = {
+    "export": ("ise-export-policy.py", []),
+    "apply-settings": ("ise-apply-settings.py", []),
+    "audit-settings": ("ise-apply-settings.py", ["--check"]),
+    "disable-expiration": ("ise-disable-ui-admin-password-expiration.py", []),
+    "reset-password": ("ise-reset-ui-admin-password.py", []),
+}
+
+def runTask(task, host, work_dir, script_args=None, timeout=None):
+    # Every host gets its own process, Chrome profile and download directory
+    hostDir = os.path.abspath(os.path.join(work_dir, host))
+    os.makedirs(hostDir, exist_ok=True)
+    logPath = os.path.join(hostDir, f"{task}.log")
+    reportPath = os.path.join(hostDir, f"{task}.json")
+    if os.path.exists(reportPath):
+        os.remove(reportPath)
+    script, task_args = TASKS[task]
+    env = dict(os.environ, ISE_HOST=host, SELENIUM_DOWNLOAD_PATH=hostDir, ISE_SETTINGS_REPORT=reportPath)
+    LOGGER.info(f"Starting {task} on {host}...")
+    start = datetime.now()
+    with open(logPath, "w") as log:
+        # Own process group, a timeout kills the script together with its chromedriver and Chrome
+        process = subprocess.Popen(
+            [sys.executable, os.path.join(SCRIPT_DIR, script)] + task_args + (script_args or []),
+            env=env,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            start_new_session=True
+        )
+        try:
+            returncode = process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                # The whole group exited between the timeout and the kill
+                pass
+            process.wait()
+            returncode = None
+    seconds = (datetime.now() - start).total_seconds()
+    result = {
+        "host": host,
+        "task": task,
+        "ok": returncode == 0,
+        "returncode": returncode,
+        "seconds": round(seconds, 3),
+        "download_path": hostDir,
+        "log": logPath,
+    }
+    # Tasks that write a report (settings results or drift) get it merged into the result
+    if os.path.exists(reportPath):
+        try:
+            with open(reportPath) as f:
+                result["report"] = json.load(f)
+        except ValueError as e:
+            # Truncated by a killed or crashed task
+            LOGGER.error(f"Unreadable {task} report of {host}: {e}")
+            result["ok"] = False
+    # Exit code 2 of a check run reports drift, the task itself succeeded
+    if returncode == 2 and result.get("report", {}).get("drift"):
+        result["ok"] = True
+    if result["ok"]:
+        LOGGER.info(f"Finished {task} on {host} in {seconds:.1f}s")
+    else:
+        LOGGER.error(f"Failed {task} on {host} after {seconds:.1f}s (returncode {returncode}), see {logPath}")
+    return result
+
+def runFleet(task, hosts, work_dir, max_workers=None, script_args=None, timeout=None):
+    start = datetime.now()
+    with ThreadPoolExecutor(max_workers=max_workers or len(hosts)) as pool:
+        results = list(pool.map(lambda host: runTask(task, host, work_dir, script_args, timeout), hosts))
+    return {
+        "task": task,
+        "ok": all(result["ok"] for result in results),
+        "drift": sorted(result["host"] for result in results if result.get("report", {}).get("drift")),
+        "seconds": round((datetime.now() - start).total_seconds(), 3),
+        "hosts": results,
+    }
+
+def main():
+
+    # process arguments, failover to environment variables
+    parser = argparse.ArgumentParser(description="Run an ISE task against several nodes concurrently", epilog="Arguments after -- are passed to the task script")
+    parser.add_argument("task", type=str, choices=sorted(TASKS), help="Task to run on every host")
+    parser.add_argument("--hosts", type=str, default=os.getenv("ISE_HOSTS", ""), help="Comma separated Cisco ISE hostnames or IP addresses (env ISE_HOSTS) (required)")
+    parser.add_argument("--max-workers", type=int, default=int(os.getenv("ISE_MAX_WORKERS", "0")), help="Maximum number of concurrent browsers, 0 for one per CPU (env ISE_MAX_WORKERS)")
+    parser.add_argument("--work-dir", type=str, default=os.getenv("ISE_FLEET_WORK_DIR", "ise-fleet"), help="Directory for per-host download directories and logs (env ISE_FLEET_WORK_DIR)")
+    parser.add_argument("--timeout", type=int, default=int(os.getenv("ISE_FLEET_TIMEOUT", "3600")), help="Seconds after which a host's task is killed (env ISE_FLEET_TIMEOUT)")
+    parser.add_argument("--report", type=str, default="", help="Write the aggregated results as JSON to this file")
+    args, script_args = parser.parse_known_args()
+    hosts = [host.strip() for host in args.hosts.split(",") if host.strip()]
+    if script_args and script_args[0] == "--":
+        script_args = script_args[1:]
+
+    if not hosts:
+        parser.print_help()
+        exit(1)
+
+    max_workers = min(len(hosts), args.max_workers or os.cpu_count() or 1)
+    report = runFleet(args.task, hosts, args.work_dir, max_workers, script_args, args.timeout)
+    for result in report["hosts"]:
+        drift = "DRIFT" if result["host"] in report["drift"] else ""
+        LOGGER.info(f"{result['host']:<30} {'OK' if result['ok'] else 'FAILED':<7} {result['seconds']:>9.1f}s {drift}")
+    LOGGER.info(f"{args.task} on {len(hosts)} hosts finished in {report['seconds']:.1f}s")
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    exit(1 if not report["ok"] else 2 if report["drift"] else 0)
+
+if __name__ == "__main__":
+    main()
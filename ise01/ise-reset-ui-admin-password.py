@@ -13,7 +13,7 @@ from datetime import datetime
 import argparse
 import os
 
-def main():
+def main(argv=None):
 
     # process arguments, failover to environment variables
     parser = argparse.ArgumentParser()
@@ -21,7 +21,7 @@ def main():
     parser.add_argument("--username", type=str, default=os.getenv("ISE_USERNAME", ""), help="Cisco ISE username (env ISE_USERNAME) (required)")
     parser.add_argument("--old-password", type=str, default=os.getenv("ISE_OLD_PASSWORD", ""), help="Cisco ISE initial admin password (env ISE_OLD_PASSWORD) (required)")
     parser.add_argument("--new-password", type=str, default=os.getenv("ISE_NEW_PASSWORD", ""), help="Cisco ISE final admin password (env ISE_NEW_PASSWORD) (required)")
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     host = args.host
     username = args.username
     old_password = args.old_password
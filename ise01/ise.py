@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+from time import perf_counter
+import importlib
+import importlib.util
+import os
+import sys
+#
+
+# Subcommand -> (module or script in this directory, leading arguments, help). Nothing is
+# imported until a subcommand runs, so selenium is only loaded by the browser commands and
+# only once for all commands of a chain.
+COMMANDS = {
+    "reset-password": ("ise-reset-ui-admin-password.py", [], "Reset the initial Admin UI password"),
+    "disable-expiration": ("ise-disable-ui-admin-password-expiration.py", [], "Disable Admin UI password expiration"),
+    "export-policy": ("ise-export-policy.py", [], "Export PolicyConfig.xml through the Admin UI or ERS/OpenAPI"),
+    "apply-settings": ("ise-apply-settings.py", [], "Apply or audit the declarative Admin UI settings"),
+    "ready": ("ise_readiness", [], "Wait until the node and its Admin UI are ready"),
+    "policy-diff": ("ise_policy_diff", [], "Normalize and diff PolicyConfig.xml exports"),
+    "policy-archive": ("ise_policy_archive", [], "Archive exports and query policy object history"),
+    "policy-index": ("ise_policy_index", [], "Index an export in SQLite and query it"),
+    "warm-driver-cache": ("ise_utils", ["warm-driver-cache"], "Resolve ChromeDriver for the installed Chrome"),
+}
+# Separates chained subcommands: ise ready --probes http + export-policy + policy-index build f.xml
+CHAIN_SEPARATOR = "+"
+
+def loadCommand(name):
+    target = COMMANDS[name][0]
+    here = os.path.dirname(os.path.abspath(__file__))
+    if here not in sys.path:
+        sys.path.insert(0, here)
+    if not target.endswith(".py"):
+        return importlib.import_module(target)
+    # The scripts have dashes in their names, they are loaded from their path
+    moduleName = "ise_cmd_" + name.replace("-", "_")
+    if moduleName in sys.modules:
+        return sys.modules[moduleName]
+    path = os.path.join(here, target)
+    if not os.path.exists(path):
+        raise Exception(f"{target} not found next to {__file__}, install the package in editable mode (pip install -e ise01)")
+    spec = importlib.util.spec_from_file_location(moduleName, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[moduleName] = module
+    spec.loader.exec_module(module)
+    return module
+
+def runCommand(name, args):
+    # Returns the exit code, the scripts end with exit() on usage errors or failed checks
+    module = loadCommand(name)
+    argv = sys.argv
+    sys.argv = [f"ise {name}"] + args
+    try:
+        module.main(COMMANDS[name][1] + args)
+        return 0
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            code = e.code or 0
+        else:
+            print(e.code, file=sys.stderr)
+            code = 1
+        if code:
+            flushForensics(f"ise {name}: exit({e.code!r})")
+        return code
+    finally:
+        sys.argv = argv
+
+def flushForensics(error):
+    # The exit never reaches sys.excepthook, write the frames of the failed command here.
+    # Only when a browser command already loaded the module.
+    forensics = sys.modules.get("ise_forensics")
+    if forensics is not None:
+        forensics.flushFailure(error)
+
+def splitChain(args):
+    chain = [[]]
+    for arg in args:
+        if arg == CHAIN_SEPARATOR:
+            chain.append([])
+        else:
+            chain[-1].append(arg)
+    return [(command[0], command[1:]) for command in chain if command]
+
+def printHelp():
+    print(f"usage: ise [--keep-going] <command> [args...] [{CHAIN_SEPARATOR} <command> [args...] ...]\n")
+    print("Run one or more ISE automation commands in a single process.\n")
+    print("commands:")
+    for name, (target, leading, description) in COMMANDS.items():
+        print(f"  {name:<20} {description}")
+    print(f"\nCommands separated by '{CHAIN_SEPARATOR}' run in order, the chain stops at the first failure")
+    print("unless --keep-going is given. 'ise <command> --help' shows the options of a command.")
+
+def main(argv=None):
+    args = list(sys.argv[1:] if argv is None else argv)
+    keep_going = False
+    if args[:1] == ["--keep-going"]:
+        keep_going = True
+        args = args[1:]
+    chain = splitChain(args)
+
+    if not chain or chain[0][0] in ("-h", "--help"):
+        printHelp()
+        exit(0 if chain else 1)
+    unknown = [name for name, _ in chain if name not in COMMANDS]
+    if unknown:
+        print(f"Unknown command(s): {', '.join(unknown)}\n", file=sys.stderr)
+        printHelp()
+        exit(1)
+
+    status = 0
+    for name, commandArgs in chain:
+        start = perf_counter()
+        try:
+            code = runCommand(name, commandArgs)
+        except Exception:
+            if not keep_going:
+                raise
+            # Same reporting as an uncaught exception (traceback, ise_forensics), then go on
+            sys.excepthook(*sys.exc_info())
+            code = 1
+        if len(chain) > 1:
+            print(f"ise {name}: exit {code} in {perf_counter() - start:.1f}s", file=sys.stderr)
+        if code:
+            status = status or code
+            if not keep_going:
+                break
+    exit(status)
+
+if __name__ == "__main__":
+    main()
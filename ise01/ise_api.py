@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+#
+from ise_policy_layout import EXPORT_ROOT, EXPORT_SECTIONS, RULE_SECTIONS
+#
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from xml.etree import ElementTree as ET
+import logging
+import re
+#
+
+# No ise_utils import, the API export runs without selenium
+LOGGER = logging.getLogger("selenium")
+
+# The export is written in the PolicyConfig.xml layout of the Admin UI export (ise_policy_layout)
+# Policy sets with their per-set rule collections: (XML section, OpenAPI base path)
+OPENAPI_POLICY_SETS = [
+    ("NetworkAccessPolicySets", "/api/v1/policy/network-access"),
+    ("DeviceAdminPolicySets", "/api/v1/policy/device-admin"),
+]
+OPENAPI_POLICY_SET_RULES = {
+    "AuthenticationRules": "authentication",
+    "AuthorizationRules": "authorization",
+    "LocalExceptionRules": "exception",
+}
+# Plain OpenAPI collections: (XML section, path)
+OPENAPI_COLLECTIONS = [
+    ("NetworkAccessGlobalExceptionRules", "/api/v1/policy/network-access/policy-set/global-exception"),
+    ("NetworkAccessConditions", "/api/v1/policy/network-access/condition"),
+    ("NetworkAccessTimeAndDateConditions", "/api/v1/policy/network-access/time-condition"),
+    ("DeviceAdminGlobalExceptionRules", "/api/v1/policy/device-admin/policy-set/global-exception"),
+    ("DeviceAdminConditions", "/api/v1/policy/device-admin/condition"),
+    ("DeviceAdminTimeAndDateConditions", "/api/v1/policy/device-admin/time-condition"),
+]
+# ERS resources referenced from policy rules: (XML section, ERS resource)
+ERS_RESOURCES = [
+    ("AuthorizationProfiles", "authorizationprofile"),
+    ("DownloadableAcls", "downloadableacl"),
+    ("AllowedProtocols", "allowedprotocols"),
+    ("EndpointIdentityGroups", "endpointgroup"),
+    ("UserIdentityGroups", "identitygroup"),
+    ("NetworkDeviceGroups", "networkdevicegroup"),
+    ("TacacsProfiles", "tacacsprofile"),
+    ("TacacsCommandSets", "tacacscommandsets"),
+]
+# API bookkeeping the UI export does not carry: object ids, self links and hit counters
+API_ONLY_FIELDS = {"id", "link", "hitCounts"}
+
+def getApiSession(username, password, pool_size=8, verify=False):
+    # One keep-alive connection pool shared by every request of the export
+    session = requests.Session()
+    session.auth = (username, password)
+    session.verify = verify
+    session.headers.update({"Accept": "application/json", "Content-Type": "application/json"})
+    retries = Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504], allowed_methods=["GET"])
+    session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retries))
+    if not verify:
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    return session
+
+def getJson(session, url, timeout=30):
+    # verify passed per request, otherwise REQUESTS_CA_BUNDLE in the environment overrides session.verify
+    response = session.get(url, timeout=timeout, verify=session.verify)
+    response.raise_for_status()
+    return response.json()
+
+def getOpenApi(session, baseUrl, path, timeout=30):
+    return getJson(session, f"{baseUrl}{path}", timeout).get("response", [])
+
+def isMissing(e):
+    # A 404 means the feature is not available on this node (e.g. device admin not enabled).
+    # Anything else (5xx, 401/403, ERS disabled) would silently truncate the export.
+    return e.response is not None and e.response.status_code == 404
+
+def getPolicySetRules(session, baseUrl, basePath, policySetId, kind, timeout=30):
+    try:
+        return getOpenApi(session, baseUrl, f"{basePath}/policy-set/{policySetId}/{kind}", timeout)
+    except requests.HTTPError as e:
+        # Local exceptions are not available on every release
+        if isMissing(e):
+            return []
+        raise
+
+def getIseVersion(session, baseUrl, timeout=30):
+    result = getJson(session, f"{baseUrl}/ers/config/op/systemconfig/iseversion", timeout)["OperationResult"]
+    return next((item["value"] for item in result.get("resultValue", []) if item.get("name") == "version"), None)
+
+def getErsResources(session, baseUrl, resource, pool, timeout=30):
+    summaries = []
+    url = f"{baseUrl}/ers/config/{resource}?size=100&page=1"
+    while url:
+        result = getJson(session, url, timeout)["SearchResult"]
+        summaries.extend(result.get("resources", []))
+        url = result.get("nextPage", {}).get("href")
+    # List calls only return id/name, details are fetched concurrently over the pooled session
+    details = pool.map(lambda summary: getJson(session, f"{baseUrl}/ers/config/{resource}/{summary['id']}", timeout), summaries)
+    return [next(iter(detail.values())) for detail in details]
+
+def xmlTag(name):
+    tag = re.sub(r"[^A-Za-z0-9_.-]", "_", str(name))
+    return tag if re.match(r"[A-Za-z_]", tag) else f"_{tag}"
+
+def toElement(tag, value):
+    element = ET.Element(xmlTag(tag))
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key not in API_ONLY_FIELDS:
+                appendField(element, key, item)
+    elif isinstance(value, bool):
+        element.text = "true" if value else "false"
+    elif value is not None:
+        element.text = str(value)
+    return element
+
+def appendField(parent, key, value):
+    # Like the UI export a list repeats its field element once per item, empty fields are left out
+    if value is None or value == [] or value == {}:
+        return
+    for item in value if isinstance(value, list) else [value]:
+        parent.append(toElement(key, item))
+
+def ruleElement(rule):
+    # OpenAPI nests name, rank, state and condition under "rule", the export has them on the Rule
+    fields = dict(rule.get("rule", {}))
+    fields.update((key, item) for key, item in rule.items() if key != "rule")
+    return toElement("Rule", fields)
+
+def appendSection(root, tag, elements):
+    if elements:
+        ET.SubElement(root, tag).extend(elements)
+
+def exportPolicyApi(host, username, password, path, pool_size=8, timeout=30):
+    start = datetime.now()
+    baseUrl = f"https://{host}"
+    LOGGER.info("Exporting Policy through ERS/OpenAPI...")
+    session = getApiSession(username, password, pool_size=pool_size)
+    root = ET.Element(EXPORT_ROOT)
+    ET.SubElement(root, "version").text = getIseVersion(session, baseUrl, timeout)
+    ET.SubElement(root, "exportTime").text = start.isoformat(timespec="seconds")
+    with ThreadPoolExecutor(max_workers=pool_size) as pool:
+        for section, basePath in OPENAPI_POLICY_SETS:
+            try:
+                policySets = getOpenApi(session, baseUrl, f"{basePath}/policy-set", timeout)
+            except requests.HTTPError as e:
+                if section == "NetworkAccessPolicySets" or not isMissing(e):
+                    raise
+                LOGGER.warning(f"Skipping {section}: {e}")
+                continue
+            policySetElements = []
+            for policySet in policySets:
+                policySetElement = toElement(EXPORT_SECTIONS[section][0], policySet)
+                rules = pool.map(
+                    lambda kind: getPolicySetRules(session, baseUrl, basePath, policySet["id"], kind, timeout),
+                    [OPENAPI_POLICY_SET_RULES[rulesTag] for rulesTag in RULE_SECTIONS]
+                )
+                for rulesTag, ruleList in zip(RULE_SECTIONS, rules):
+                    appendSection(policySetElement, rulesTag, [ruleElement(rule) for rule in ruleList])
+                policySetElements.append(policySetElement)
+            appendSection(root, section, policySetElements)
+            LOGGER.info(f"Exported {len(policySets)} {section}.")
+        for section, collectionPath in OPENAPI_COLLECTIONS:
+            try:
+                objects = getOpenApi(session, baseUrl, collectionPath, timeout)
+            except requests.HTTPError as e:
+                if not isMissing(e):
+                    raise
+                LOGGER.warning(f"Skipping {section}: {e}")
+                continue
+            objectTag, kind = EXPORT_SECTIONS[section]
+            appendSection(root, section, [ruleElement(item) if kind == "rule" else toElement(objectTag, item) for item in objects])
+            LOGGER.info(f"Exported {len(objects)} {section}.")
+        for section, resource in ERS_RESOURCES:
+            # Every ERS resource exists whenever ERS is enabled, any error fails the export
+            objects = getErsResources(session, baseUrl, resource, pool, timeout)
+            appendSection(root, section, [toElement(EXPORT_SECTIONS[section][0], item) for item in objects])
+            LOGGER.info(f"Exported {len(objects)} {section}.")
+    session.close()
+    ET.indent(root)
+    ET.ElementTree(root).write(path, encoding="UTF-8", xml_declaration=True)
+    LOGGER.info(f"Policy exported through ERS/OpenAPI to {path} in {datetime.now() - start}")
+    return path
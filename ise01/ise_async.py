@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+
+from ise_timing import getHost, getWaitBudget, recordLatency
+from ise_utils import (
+    getBrowserProfile, getChromeOptions, getDownloadPath, LEAN_BLOCKED_URLS, LOGGER,
+    PAGE_READY_SCRIPT, POPUP_RESOLVER_SCRIPT,
+)
+#
+from datetime import datetime
+from urllib.request import urlopen
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+#
+
+# Async counterparts of the ise_utils surface on the Chrome DevTools Protocol. One websocket
+# carries any number of tabs (flat sessions), so a single event loop can drive many ISE
+# sessions at once. Waits run inside the page (the same scripts as ise_utils) and are
+# awaited, nothing blocks the loop. Locators are (by, value) tuples like selenium's, the
+# selenium By constants can be used for them.
+CHROME_BINARIES = ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser")
+
+# Finds an element for a (by, value) locator and reports whether it can be interacted with
+FIND_ELEMENT_JS = """
+function findElement(by, value) {
+    if (by === "id") { return document.getElementById(value); }
+    if (by === "name") { return document.getElementsByName(value)[0] || null; }
+    if (by === "class name") { return document.getElementsByClassName(value)[0] || null; }
+    if (by === "css selector") { return document.querySelector(value); }
+    if (by === "link text") {
+        return Array.prototype.find.call(document.querySelectorAll("a"), function (a) { return a.textContent.trim() === value; }) || null;
+    }
+    if (by === "xpath") {
+        return document.evaluate(value, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    }
+    throw new Error("Unsupported locator " + by);
+}
+function interactable(element) {
+    return !!(element && !element.disabled && (element.offsetWidth || element.offsetHeight || element.getClientRects().length));
+}
+"""
+
+# Resolves true once every locator matches an interactable element, false on timeout
+WAIT_ELEMENTS_SCRIPT = FIND_ELEMENT_JS + """
+var locators = arguments[0], timeoutMs = arguments[1];
+var done = arguments[arguments.length - 1];
+function ready() {
+    return locators.every(function (locator) { return interactable(findElement(locator[0], locator[1])); });
+}
+if (ready()) { done(true); return; }
+var timer = null;
+var observer = new MutationObserver(function () {
+    if (ready()) { observer.disconnect(); clearTimeout(timer); done(true); }
+});
+observer.observe(document.documentElement, {childList: true, subtree: true, attributes: true});
+timer = setTimeout(function () { observer.disconnect(); done(ready()); }, timeoutMs);
+"""
+
+# Scrolls the element into view and returns the center of its box for the mouse events
+ELEMENT_CENTER_SCRIPT = FIND_ELEMENT_JS + """
+var element = findElement(arguments[0], arguments[1]);
+if (!element) { return null; }
+element.scrollIntoView({block: "center", inline: "center"});
+var rect = element.getBoundingClientRect();
+return {x: rect.left + rect.width / 2, y: rect.top + rect.height / 2};
+"""
+
+class CdpConnection:
+    # Request/response matching by id and event fan-out for one DevTools websocket
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.nextId = 0
+        self.pending = {}
+        self.listeners = []
+        self.reader = asyncio.get_running_loop().create_task(self.read())
+
+    @classmethod
+    async def connect(cls, url):
+        # Imported lazily, only the async API needs the websockets package
+        from websockets.asyncio.client import connect
+        return cls(await connect(url, max_size=None, ping_interval=None))
+
+    async def read(self):
+        try:
+            async for message in self.websocket:
+                data = json.loads(message)
+                if "id" in data:
+                    future = self.pending.pop(data["id"], None)
+                    if future is None or future.done():
+                        continue
+                    if "error" in data:
+                        future.set_exception(Exception(f"CDP error {data['error'].get('message')} at {datetime.now()}"))
+                    else:
+                        future.set_result(data.get("result", {}))
+                else:
+                    for listener in list(self.listeners):
+                        listener(data)
+        finally:
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("DevTools connection closed"))
+            self.pending.clear()
+
+    async def send(self, method, params=None, session_id=None, timeout=None):
+        self.nextId += 1
+        message = {"id": self.nextId, "method": method, "params": params or {}}
+        if session_id:
+            message["sessionId"] = session_id
+        future = asyncio.get_running_loop().create_future()
+        self.pending[self.nextId] = future
+        await self.websocket.send(json.dumps(message))
+        return await asyncio.wait_for(future, timeout)
+
+    def waitForEvent(self, method, session_id=None, predicate=None):
+        # Returns a future for the next matching event, register it before triggering the event
+        future = asyncio.get_running_loop().create_future()
+
+        def listener(event):
+            if event.get("method") != method or (session_id and event.get("sessionId") != session_id):
+                return
+            if predicate and not predicate(event.get("params", {})):
+                return
+            self.listeners.remove(listener)
+            if not future.done():
+                future.set_result(event.get("params", {}))
+
+        self.listeners.append(listener)
+        future.add_done_callback(lambda _: listener in self.listeners and self.listeners.remove(listener))
+        return future
+
+    async def close(self):
+        await self.websocket.close()
+        await asyncio.gather(self.reader, return_exceptions=True)
+
+class AsyncBrowser:
+    def __init__(self, connection, process=None, user_data_dir=None):
+        self.connection = connection
+        self.process = process
+        self.user_data_dir = user_data_dir
+
+    @classmethod
+    async def launch(cls, download_path=None, profile=None, timeout=30):
+        # Same command line as the selenium driver, plus a DevTools port picked by Chrome
+        binary = next((shutil.which(name) for name in CHROME_BINARIES if shutil.which(name)), None)
+        if binary is None:
+            LOGGER.error(f"Chrome not found at {datetime.now()}")
+            raise Exception(f"Chrome not found at {datetime.now()}")
+        user_data_dir = tempfile.mkdtemp(prefix="ise-async-")
+        arguments = getChromeOptions(download_path, profile).arguments + [
+            "--remote-debugging-port=0",
+            f"--user-data-dir={user_data_dir}",
+            "about:blank",
+        ]
+        LOGGER.info("Starting Chrome...")
+        process = await asyncio.create_subprocess_exec(binary, *arguments, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL)
+        portFile = os.path.join(user_data_dir, "DevToolsActivePort")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while not os.path.exists(portFile) or os.path.getsize(portFile) == 0:
+            if process.returncode is not None or loop.time() > deadline:
+                LOGGER.error(f"Chrome did not open its DevTools port at {datetime.now()}")
+                raise Exception(f"Chrome did not open its DevTools port at {datetime.now()}")
+            await asyncio.sleep(0.05)
+        with open(portFile) as f:
+            port, path = f.read().split()[:2]
+        connection = await CdpConnection.connect(f"ws://127.0.0.1:{port}{path}")
+        LOGGER.info("Chrome started.")
+        return cls(connection, process, user_data_dir)
+
+    @classmethod
+    async def attach(cls, debugger_address):
+        # Attach to a Chrome started elsewhere, e.g. by chromedriver ("goog:chromeOptions" debuggerAddress)
+        with await asyncio.to_thread(urlopen, f"http://{debugger_address}/json/version", timeout=10) as response:
+            url = json.load(response)["webSocketDebuggerUrl"]
+        return cls(await CdpConnection.connect(url))
+
+    async def newPage(self, download_path=None, profile=None, isolated=True):
+        # isolated pages get their own browser context, so ISE sessions in other tabs do not share cookies
+        params = {"url": "about:blank"}
+        context_id = None
+        if isolated:
+            context_id = (await self.connection.send("Target.createBrowserContext"))["browserContextId"]
+            params["browserContextId"] = context_id
+        target_id = (await self.connection.send("Target.createTarget", params))["targetId"]
+        page = await self.attachPage(target_id, context_id)
+        downloadParams = {"behavior": "allow", "downloadPath": getDownloadPath(download_path), "eventsEnabled": True}
+        if context_id:
+            downloadParams["browserContextId"] = context_id
+        await self.connection.send("Browser.setDownloadBehavior", downloadParams)
+        if getBrowserProfile(profile) == "lean":
+            await page.send("Network.enable")
+            await page.send("Network.setBlockedURLs", {"urls": LEAN_BLOCKED_URLS})
+            page.readyState = "interactive"
+        return page
+
+    async def attachPage(self, target_id, context_id=None):
+        session_id = (await self.connection.send("Target.attachToTarget", {"targetId": target_id, "flatten": True}))["sessionId"]
+        page = AsyncPage(self, target_id, session_id, context_id)
+        await page.send("Page.enable")
+        await page.send("Runtime.enable")
+        info = await self.connection.send("Target.getTargetInfo", {"targetId": target_id})
+        page.current_url = info["targetInfo"]["url"]
+        return page
+
+    async def close(self):
+        if self.process is not None:
+            try:
+                await self.connection.send("Browser.close", timeout=5)
+            except Exception:
+                self.process.kill()
+            await self.process.wait()
+        await self.connection.close()
+        if self.user_data_dir:
+            shutil.rmtree(self.user_data_dir, ignore_errors=True)
+
+class AsyncPage:
+    # One tab. current_url follows navigations, so ise_timing.getHost works with it as well.
+    def __init__(self, browser, target_id, session_id, context_id=None):
+        self.browser = browser
+        self.connection = browser.connection
+        self.target_id = target_id
+        self.session_id = session_id
+        self.context_id = context_id
+        self.current_url = ""
+        self.readyState = "complete"
+        self.ownsBrowser = False
+        self.connection.listeners.append(self.onEvent)
+
+    def onEvent(self, event):
+        if event.get("sessionId") != self.session_id:
+            return
+        params = event.get("params", {})
+        if event.get("method") == "Page.frameNavigated" and not params["frame"].get("parentId"):
+            self.current_url = params["frame"]["url"]
+        elif event.get("method") == "Page.navigatedWithinDocument":
+            self.current_url = params["url"]
+
+    async def send(self, method, params=None, timeout=None):
+        return await self.connection.send(method, params, self.session_id, timeout)
+
+    async def evaluate(self, expression, timeout=None):
+        result = await self.send("Runtime.evaluate", {"expression": expression, "awaitPromise": True, "returnByValue": True}, timeout)
+        if "exceptionDetails" in result:
+            details = result["exceptionDetails"]
+            message = details.get("exception", {}).get("description") or details.get("text")
+            raise Exception(f"Script failed: {message} at {datetime.now()}")
+        return result["result"].get("value")
+
+    async def executeScript(self, script, *args):
+        return await self.evaluate(f"(function () {{\n{script}\n}}).apply(window, {json.dumps(list(args))})")
+
+    async def executeAsyncScript(self, script, *args, timeout=None):
+        # Selenium's async script contract: the last argument is the completion callback
+        return await self.evaluate(
+            f"new Promise(function (resolve) {{ (function () {{\n{script}\n}}).apply(window, {json.dumps(list(args))}.concat([resolve])); }})",
+            timeout
+        )
+
+    async def get(self, url):
+        result = await self.send("Page.navigate", {"url": url})
+        if result.get("errorText"):
+            LOGGER.error(f"Navigation to {url} failed: {result['errorText']} at {datetime.now()}")
+            raise Exception(f"Navigation to {url} failed: {result['errorText']} at {datetime.now()}")
+
+    async def click(self, locator):
+        center = await self.executeScript(ELEMENT_CENTER_SCRIPT, *locator)
+        if center is None:
+            LOGGER.error(f"Element {locator} not found at {datetime.now()}")
+            raise Exception(f"Element {locator} not found at {datetime.now()}")
+        for kind in ("mouseMoved", "mousePressed", "mouseReleased"):
+            await self.send("Input.dispatchMouseEvent", {"type": kind, "x": center["x"], "y": center["y"], "button": "left", "clickCount": 1})
+
+    async def type(self, locator, text):
+        await self.click(locator)
+        await self.send("Input.insertText", {"text": text})
+
+    async def waitForElements(self, locators, timeout=30):
+        return await self.executeAsyncScript(WAIT_ELEMENTS_SCRIPT, [list(locator) for locator in locators], int(timeout * 1000))
+
+    async def quit(self):
+        if self.onEvent in self.connection.listeners:
+            self.connection.listeners.remove(self.onEvent)
+        try:
+            await self.connection.send("Target.closeTarget", {"targetId": self.target_id}, timeout=5)
+            if self.context_id:
+                await self.connection.send("Target.disposeBrowserContext", {"browserContextId": self.context_id}, timeout=5)
+        except Exception:
+            LOGGER.info("Tab was already closed.")
+        if self.ownsBrowser:
+            await self.browser.close()
+
+async def attachToDriver(driver):
+    # Async view of the tab a selenium driver controls, for moving scripts over one call at a time
+    browser = await AsyncBrowser.attach(driver.capabilities["goog:chromeOptions"]["debuggerAddress"])
+    return await browser.attachPage(driver.current_window_handle.replace("CDwindow-", ""))
+
+def contextLost(error):
+    # Runtime.evaluate fails like this when a navigation replaces the document mid-script
+    return "destroyed" in str(error) or "navigated" in str(error)
+
+async def waitForPageEvents(driver, route=None, idle=0, timeout=30):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return False
+        try:
+            return await driver.executeAsyncScript(PAGE_READY_SCRIPT, route, int(idle * 1000), int(remaining * 1000), driver.readyState)
+        except Exception as e:
+            if not contextLost(e):
+                raise
+            LOGGER.info("Document unloaded while waiting, waiting for the new one...")
+            await asyncio.sleep(0.05)
+
+async def waitForReadyState(driver, url=None, clickTarget=None, timeout=30):
+    start = datetime.now()
+    route = None
+    idle = 0
+    if url:
+        LOGGER.info(f"Waiting for {url} page to load...")
+        await driver.get(url)
+        if "#" in url:
+            route = "#" + url.split("#", 1)[1]
+            idle = 0.25
+    elif clickTarget:
+        LOGGER.info("Waiting for click to be processed...")
+        await driver.click(clickTarget)
+        idle = 0.25
+    else:
+        LOGGER.info("Waiting for page to load...")
+
+    if not await waitForPageEvents(driver, route=route, idle=idle, timeout=timeout):
+        LOGGER.error(f"Load timed out at {datetime.now()}")
+        raise Exception(f"Load timed out at {datetime.now()}")
+    LOGGER.info(f"Loaded in {datetime.now() - start}")
+
+async def waitForClick(driver, clickTarget, timeout=30):
+    await waitForReadyState(driver, clickTarget=clickTarget, timeout=timeout)
+
+async def waitForUrl(driver, url, timeout=30):
+    await waitForReadyState(driver, url=url, timeout=timeout)
+
+async def getDriver(url=None, download_path=None, profile=None, browser=None):
+    # Without a browser every page starts its own Chrome, pass a shared AsyncBrowser to run
+    # many pages in one Chrome process
+    ownsBrowser = browser is None
+    if ownsBrowser:
+        browser = await AsyncBrowser.launch(download_path, profile)
+    driver = await browser.newPage(download_path, profile)
+    driver.ownsBrowser = ownsBrowser
+    if url:
+        await waitForUrl(driver, url)
+    return driver
+
+async def iseLogin(driver, username=None, password=None, check_mode=False, timeout=30):
+    start = datetime.now()
+    LOGGER.info("Waiting for ISE login page to load...")
+    loginPageReady = "admin/login.jsp" in driver.current_url and await driver.waitForElements(
+        [("name", "username"), ("name", "password"), ("id", "loginPage_loginSubmit")], timeout
+    )
+    if loginPageReady:
+        LOGGER.info("ISE login page loaded.")
+        recordLatency(getHost(driver), "login-page", (datetime.now() - start).total_seconds())
+
+    if check_mode:
+        LOGGER.info("Returning loginPageReady status (check_mode).")
+        return loginPageReady
+
+    if not loginPageReady:
+        LOGGER.error("Failed to load ISE login page at %s", datetime.now())
+        raise Exception(f"Failed to load ISE login page at {datetime.now()}")
+
+    if not username or not password:
+        LOGGER.error("Username and password are required to login to ISE at %s", datetime.now())
+        raise Exception(f"Username and password are required to login to ISE at {datetime.now()}")
+
+    LOGGER.info("Entering username and password...")
+    await driver.type(("name", "username"), username)
+    await driver.type(("name", "password"), password)
+    LOGGER.info("Submitting login form...")
+    start = datetime.now()
+    await waitForClick(driver, ("id", "loginPage_loginSubmit"))
+    recordLatency(getHost(driver), "login-submit", (datetime.now() - start).total_seconds())
+    LOGGER.info("Login form submitted.")
+
+async def isePostLoginPopUps(driver, timeout=30):
+    host = getHost(driver)
+    first = getWaitBudget(host, "popup-first", timeout)
+    following = getWaitBudget(host, "popup-next", 5)
+    dismiss = getWaitBudget(host, "popup-dismiss", 1, minimum=0.2)
+    LOGGER.info("Resolving ISE post-login pop-ups...")
+    start = datetime.now()
+    while True:
+        try:
+            result = await driver.executeAsyncScript(
+                POPUP_RESOLVER_SCRIPT, int(first * 1000), int(following * 1000), int(dismiss * 1000), int((first + 60) * 1000)
+            )
+            break
+        except Exception as e:
+            if not contextLost(e) or (datetime.now() - start).total_seconds() > first + 60:
+                raise
+            LOGGER.info("Document unloaded while resolving pop-ups, resolving on the new one...")
+    recordLatency(host, "popup-first", result["first"], first if first < timeout else None)
+    for seconds in result["next"]:
+        recordLatency(host, "popup-next", seconds, following if following < 5 else None)
+    for seconds in result["dismiss"]:
+        recordLatency(host, "popup-dismiss", seconds, dismiss if dismiss < 1 else None)
+    if result["timedOut"]:
+        LOGGER.error("ISE pop-ups kept appearing after %s dismissed at %s", result["actions"], datetime.now())
+        raise Exception(f"ISE pop-ups kept appearing after {result['actions']} dismissed at {datetime.now()}")
+    if result["ignored"]:
+        LOGGER.info(f"ISE pop-up elements {result['ignored']} stayed after a click, left them alone.")
+    if result["actions"]:
+        LOGGER.info(f"Dismissed ISE pop-ups {result['actions']} in {datetime.now() - start}")
+    else:
+        LOGGER.info("No ISE pop-ups found.")
+
+async def iseLogout(driver, timeout=30):
+    LOGGER.info("Waiting for settings dropdown to appear...")
+    if "admin" not in driver.current_url or not await driver.waitForElements([("class name", "fi-setting")], timeout):
+        LOGGER.error("Failed to find settings dropdown to logout at %s", datetime.now())
+        raise Exception(f"Failed to find settings dropdown to logout at {datetime.now()}")
+    LOGGER.info("Clicking settings dropdown...")
+    await driver.click(("class name", "fi-setting"))
+    LOGGER.info("Waiting for logout link to appear and be clickable...")
+    if not await driver.waitForElements([("link text", "Logout")], timeout):
+        LOGGER.error("Failed to find logout link at %s", datetime.now())
+        raise Exception(f"Failed to find logout link at {datetime.now()}")
+    LOGGER.info("Clicking logout link...")
+    await waitForClick(driver, ("link text", "Logout"))
+    LOGGER.info("Logout successful.")
+
+async def checkLogin(browser, host, username, password):
+    start = datetime.now()
+    driver = await getDriver(url=f"https://{host}/admin/login.jsp", browser=browser)
+    try:
+        await iseLogin(driver, username, password, timeout=60)
+        await isePostLoginPopUps(driver)
+        await iseLogout(driver)
+        return {"host": host, "ok": True, "seconds": round((datetime.now() - start).total_seconds(), 3)}
+    except Exception as e:
+        LOGGER.error(f"Login check on {host} failed: {e}")
+        return {"host": host, "ok": False, "seconds": round((datetime.now() - start).total_seconds(), 3), "error": str(e)}
+    finally:
+        await driver.quit()
+
+async def checkLogins(hosts, username, password, profile=None):
+    # All hosts in one Chrome process and one event loop, each in its own browser context
+    browser = await AsyncBrowser.launch(profile=profile)
+    try:
+        return await asyncio.gather(*(checkLogin(browser, host, username, password) for host in hosts))
+    finally:
+        await browser.close()
+
+def main():
+
+    # process arguments, failover to environment variables
+    parser = argparse.ArgumentParser(description="Log in to and out of several ISE nodes concurrently from one event loop")
+    parser.add_argument("--hosts", type=str, default=os.getenv("ISE_HOSTS", os.getenv("ISE_HOST", "")), help="Comma separated Cisco ISE hostnames or IP addresses (env ISE_HOSTS or ISE_HOST) (required)")
+    parser.add_argument("--username", type=str, default=os.getenv("ISE_USERNAME", ""), help="Cisco ISE username (env ISE_USERNAME) (required)")
+    parser.add_argument("--password", type=str, default=os.getenv("ISE_PASSWORD", ""), help="Cisco ISE password (env ISE_PASSWORD) (required)")
+    args = parser.parse_args()
+    hosts = [host.strip() for host in args.hosts.split(",") if host.strip()]
+
+    if not hosts or not args.username or not args.password:
+        parser.print_help()
+        exit(1)
+
+    results = asyncio.run(checkLogins(hosts, args.username, args.password))
+    print(json.dumps(results, indent=2))
+    exit(0 if all(result["ok"] for result in results) else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+
+from collections import deque
+from datetime import datetime
+import base64
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import traceback
+#
+
+LOGGER = logging.getLogger("selenium")
+
+# Opt-in. The last FORENSICS_FRAMES DOM snapshots and screenshots (JPEG) of every driver are
+# kept in memory. A background thread captures them at step boundaries (markStep) and every
+# FORENSICS_INTERVAL seconds over its own DevTools websocket to the page, the WebDriver command
+# channel of the script is never used or waited on. A screenshot is only taken when the DOM
+# changed since the last frame. The frames are only written to FORENSICS_DIR when an exception
+# escapes the script or it exits with a non-zero code. Needs the websockets package.
+FORENSICS = os.getenv("ISE_FORENSICS", "false").lower() == "true"
+FORENSICS_DIR = os.getenv("ISE_FORENSICS_DIR", os.path.join(os.getcwd(), "forensics"))
+FORENSICS_FRAMES = int(os.getenv("ISE_FORENSICS_FRAMES", "20"))
+FORENSICS_INTERVAL = float(os.getenv("ISE_FORENSICS_INTERVAL", "5"))
+FORENSICS_JPEG_QUALITY = 40
+
+DOM_SNAPSHOT_EXPRESSION = "JSON.stringify({url: location.href, title: document.title, html: document.documentElement.outerHTML})"
+
+_lock = threading.Lock()
+_pending = []
+_hookInstalled = False
+
+def pageWebSocketUrl(driver):
+    # DevTools websocket of the tab the driver controls, read once while the script waits anyway
+    address = driver.capabilities["goog:chromeOptions"]["debuggerAddress"]
+    return f"ws://{address}/devtools/page/{driver.current_window_handle.replace('CDwindow-', '')}"
+
+class ForensicsRecorder:
+    def __init__(self, url, frames=FORENSICS_FRAMES, interval=FORENSICS_INTERVAL):
+        # Imported lazily, only recording needs the websockets package
+        from websockets.sync.client import connect
+        # A second DevTools client of the page, independent of chromedriver's
+        self.connection = connect(url, max_size=None, open_timeout=10)
+        self.nextId = 0
+        self.frames = deque(maxlen=frames)
+        self.interval = interval
+        self.label = "start"
+        self.wakeup = threading.Event()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="forensics", daemon=True)
+        self.thread.start()
+
+    def send(self, method, params=None, timeout=10):
+        self.nextId += 1
+        self.connection.send(json.dumps({"id": self.nextId, "method": method, "params": params or {}}))
+        while True:
+            data = json.loads(self.connection.recv(timeout=timeout))
+            if data.get("id") != self.nextId:
+                continue
+            if "error" in data:
+                raise Exception(f"CDP error {data['error'].get('message')} at {datetime.now()}")
+            return data.get("result", {})
+
+    def capture(self, label):
+        dom = self.send("Runtime.evaluate", {"expression": DOM_SNAPSHOT_EXPRESSION, "returnByValue": True})["result"].get("value")
+        if self.frames and self.frames[-1]["dom"] == dom:
+            return
+        # Stays base64, decoding is left to flush(), which usually never happens
+        screenshot = self.send(
+            "Page.captureScreenshot", {"format": "jpeg", "quality": FORENSICS_JPEG_QUALITY, "optimizeForSpeed": True}
+        )["data"]
+        self.frames.append({"time": datetime.now(), "label": label, "screenshot": screenshot, "dom": dom})
+
+    def run(self):
+        failures = 0
+        while not self.stopped.is_set():
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+            if self.stopped.is_set():
+                return
+            try:
+                self.capture(self.label)
+                failures = 0
+            except Exception as e:
+                # Navigation in progress or the browser is gone
+                failures += 1
+                if failures >= 3:
+                    LOGGER.info(f"Forensics capture stopped ({type(e).__name__}).")
+                    return
+
+    def mark(self, label):
+        # Only wakes up the capture thread
+        self.label = label
+        self.wakeup.set()
+
+    def stop(self, final=False):
+        if self.stopped.is_set():
+            return
+        self.stopped.set()
+        self.wakeup.set()
+        self.thread.join(timeout=30)
+        try:
+            if final:
+                self.capture("failure")
+        except Exception as e:
+            LOGGER.info(f"Final forensics capture failed ({type(e).__name__}).")
+        finally:
+            self.connection.close()
+
+    def flush(self, folder, error=None):
+        os.makedirs(folder, exist_ok=True)
+        index = []
+        for number, frame in enumerate(self.frames):
+            name = f"{number:02d}-{re.sub(r'[^A-Za-z0-9_.-]+', '_', frame['label'])[:60]}"
+            with open(os.path.join(folder, name + ".jpg"), "wb") as f:
+                f.write(base64.b64decode(frame["screenshot"]))
+            dom = json.loads(frame["dom"]) if frame["dom"] else {}
+            with open(os.path.join(folder, name + ".html"), "w") as f:
+                f.write(dom.get("html", ""))
+            index.append({"time": frame["time"].isoformat(), "label": frame["label"], "url": dom.get("url"), "title": dom.get("title"), "files": [name + ".jpg", name + ".html"]})
+        with open(os.path.join(folder, "frames.json"), "w") as f:
+            json.dump(index, f, indent=2)
+        if error:
+            with open(os.path.join(folder, "error.txt"), "w") as f:
+                f.write(error)
+        self.frames.clear()
+        return len(index)
+
+def flushPending(error=None, recorders=None):
+    with _lock:
+        if recorders is None:
+            recorders = list(_pending)
+        for recorder in recorders:
+            if recorder in _pending:
+                _pending.remove(recorder)
+    for number, recorder in enumerate(recorders):
+        if not recorder.frames:
+            continue
+        folder = os.path.join(FORENSICS_DIR, f"{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}-{os.getpid()}-{number}")
+        count = recorder.flush(folder, error)
+        LOGGER.error(f"Wrote {count} forensics frames to {folder}")
+
+def flushFailure(error=None):
+    # Writes the frames of every recorder after a failure, live drivers get a last capture
+    try:
+        for recorder in [recorder for recorder in list(_pending) if not recorder.stopped.is_set()]:
+            recorder.stop(final=True)
+        flushPending(error)
+    except Exception as e:
+        LOGGER.error(f"Writing forensics failed: {e}")
+
+def isFailure(excType, excValue):
+    # exit(0) while quitting is a clean end, any other exception or exit code is a failure
+    if excType is None:
+        return False
+    if issubclass(excType, SystemExit):
+        return excValue.code not in (None, 0)
+    return True
+
+def excepthook(excType, excValue, excTraceback):
+    flushFailure("".join(traceback.format_exception(excType, excValue, excTraceback)))
+    sys.__excepthook__(excType, excValue, excTraceback)
+
+def installExceptHook():
+    global _hookInstalled
+    if not _hookInstalled:
+        sys.excepthook = excepthook
+        _hookInstalled = True
+
+def attachForensics(driver, frames=FORENSICS_FRAMES, interval=FORENSICS_INTERVAL):
+    # Starts recording for a driver. driver.quit() during exception propagation (the finally of
+    # the scripts) takes a last capture and keeps the frames for the except hook, a clean quit
+    # drops them. SystemExit never reaches the except hook, a quit during exit() with a non-zero
+    # code writes the frames itself.
+    if not FORENSICS or frames <= 0:
+        return None
+    try:
+        recorder = ForensicsRecorder(pageWebSocketUrl(driver), frames, interval)
+    except Exception as e:
+        LOGGER.warning(f"Forensics disabled, no DevTools connection to the page ({type(e).__name__}: {e}).")
+        return None
+    installExceptHook()
+    driver.forensics = recorder
+    with _lock:
+        _pending.append(recorder)
+    quit = driver.quit
+
+    def forensicQuit():
+        excType, excValue = sys.exc_info()[:2]
+        failing = isFailure(excType, excValue)
+        recorder.stop(final=failing)
+        if failing and issubclass(excType, SystemExit):
+            flushPending(f"exit({excValue.code!r})", [recorder])
+        elif not failing:
+            with _lock:
+                if recorder in _pending:
+                    _pending.remove(recorder)
+            recorder.frames.clear()
+        quit()
+
+    driver.quit = forensicQuit
+    return recorder
+
+def markStep(driver, label):
+    recorder = getattr(driver, "forensics", None)
+    if recorder is not None:
+        recorder.mark(label)
@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+#
+import argparse
+import base64
+import json
+import os
+import random
+import secrets
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+#
+
+# Local stand-in for the ISE admin pages the ise01 scripts touch. Element ids, classes and
+# routes mirror the real UI; every response can be delayed and failed on purpose.
+
+LOGIN_PAGE = """<!DOCTYPE html>
+<html><head><title>Identity Services Engine</title></head><body>
+<form method="post" action="/admin/LoginAction.do">
+  <input type="text" name="username" autocomplete="off">
+  <input type="password" name="password" autocomplete="off">
+  <button type="submit" id="loginPage_loginSubmit">Login</button>
+</form>
+</body></html>"""
+
+RESET_PAGE = """<!DOCTYPE html>
+<html><head><title>Identity Services Engine - Reset Password</title></head><body>
+<form method="post" action="/admin/resetPassword">
+  <input type="password" id="PWD" name="PWD">
+  <input type="password" id="confirmPWD" name="confirmPWD">
+  <button type="submit" id="rstBtn">Reset</button>
+</form>
+</body></html>"""
+
+APP_PAGE = """<!DOCTYPE html>
+<html><head><title>Identity Services Engine</title>
+<style>.hidden { display: none; } #sidenav { width: 200px; } #sidenav.toggled { width: 20px; }</style>
+</head><body>
+<div id="header"><span class="fi-setting" tabindex="0">Settings</span>
+  <div id="settings-menu" class="hidden"><a href="/admin/logout.jsp">Logout</a></div></div>
+<div id="sidenav" class=""><span class="sidenav-toggler">&#9776;</span></div>
+<div id="content"></div>
+<script>
+var config = __CONFIG__;
+function request(method, url, body) {
+    return fetch(url, {method: method, credentials: "same-origin", body: body ? JSON.stringify(body) : undefined})
+        .then(function (response) { return response.json(); });
+}
+document.querySelector(".fi-setting").addEventListener("click", function () {
+    document.getElementById("settings-menu").classList.remove("hidden");
+});
+document.querySelector(".sidenav-toggler").addEventListener("click", function () {
+    var sidenav = document.getElementById("sidenav");
+    sidenav.className = sidenav.className === "toggled" ? "" : "toggled";
+});
+function showAlerts(remaining) {
+    if (remaining <= 0) { showModal(); return; }
+    var alert = document.createElement("div");
+    alert.className = "xwtAlert";
+    alert.innerHTML = "<p>Notice " + remaining + "</p><button type='button'>OK</button>";
+    alert.querySelector("button").addEventListener("click", function () {
+        alert.remove();
+        setTimeout(function () { showAlerts(remaining - 1); }, config.popupDelay);
+    });
+    document.body.appendChild(alert);
+}
+function showModal() {
+    if (config.slides <= 0) { showCloseIcon(); return; }
+    var slide = 1;
+    var modal = document.createElement("div");
+    modal.id = "ise-modal";
+    modal.innerHTML = "<p id='slide'>Slide 1</p><button type='button' id='carousel-next'>Next</button>";
+    modal.querySelector("#carousel-next").addEventListener("click", function () {
+        slide += 1;
+        if (slide > config.slides) { modal.remove(); setTimeout(showCloseIcon, config.popupDelay); return; }
+        modal.querySelector("#slide").textContent = "Slide " + slide;
+    });
+    document.body.appendChild(modal);
+}
+function showCloseIcon() {
+    if (!config.closeIcon) { return; }
+    var icon = document.createElement("span");
+    icon.className = "xwtCloseIcon";
+    icon.textContent = "x";
+    icon.addEventListener("click", function () { icon.style.display = "none"; });
+    document.body.appendChild(icon);
+}
+function renderAuthentication(content, settings) {
+    content.innerHTML = "<ul><li><span>Authentication Method</span></li><li><span>Password Policy</span></li></ul><div id='tab'></div>";
+    content.querySelectorAll("span")[1].addEventListener("click", function () {
+        var tab = document.getElementById("tab");
+        tab.innerHTML = "<input type='checkbox' id='adminAuthSettingsStub.passwordDisableUserAccountChk'>" +
+            "<button type='button' id='submitAuthBtn' disabled>Save</button>";
+        var checkbox = document.getElementById("adminAuthSettingsStub.passwordDisableUserAccountChk");
+        var save = document.getElementById("submitAuthBtn");
+        checkbox.checked = settings.passwordDisableUserAccountChk;
+        checkbox.addEventListener("change", function () { save.disabled = false; });
+        save.addEventListener("click", function () {
+            request("POST", "/admin/api/settings", {passwordDisableUserAccountChk: checkbox.checked});
+            save.disabled = true;
+        });
+    });
+}
+function renderPolicyExport(content) {
+    content.innerHTML = "<input type='checkbox' id='expNoEncryp'><input type='checkbox' id='dwnLclComp'>" +
+        "<button type='button' id='exportPolicy'>Export</button>";
+    document.getElementById("exportPolicy").addEventListener("click", function () {
+        window.location = "/admin/PolicyExport.do";
+    });
+}
+function route() {
+    var content = document.getElementById("content");
+    var view = location.hash.split("/").pop();
+    content.innerHTML = "";
+    request("GET", "/admin/api/view?name=" + encodeURIComponent(view)).then(function (data) {
+        if (view === "adminAccess_authentication") { renderAuthentication(content, data.settings); }
+        if (view === "backup_restore_policy_export") { renderPolicyExport(content); }
+    });
+}
+window.addEventListener("hashchange", route);
+route();
+setTimeout(function () { showAlerts(config.alerts); }, config.popupDelay);
+</script>
+</body></html>"""
+
+# The policy of the mock node, once as the Admin UI exports it and once as ERS/OpenAPI serves
+# it. Both export modes have to produce the same PolicyConfig.xml from them.
+POLICY_EXPORT = """<?xml version="1.0" encoding="UTF-8"?>
+<Root>
+  <version>3.4.0.608</version>
+  <exportTime>{now}</exportTime>
+  <NetworkAccessPolicySets>
+    <PolicySet>
+      <name>Wired</name>
+      <rank>0</rank>
+      <state>enabled</state>
+      <default>false</default>
+      <condition>
+        <conditionType>ConditionReference</conditionType>
+        <isNegate>false</isNegate>
+        <name>Wired_802.1X</name>
+      </condition>
+      <AuthenticationRules>
+        <Rule><name>Default</name><rank>0</rank><state>enabled</state><default>true</default><identitySourceName>Internal Users</identitySourceName></Rule>
+      </AuthenticationRules>
+      <AuthorizationRules>
+        <Rule><name>Permit</name><rank>0</rank><state>enabled</state><default>false</default><profile>PermitAccess</profile></Rule>
+      </AuthorizationRules>
+    </PolicySet>
+    <PolicySet>
+      <name>Default</name>
+      <rank>1</rank>
+      <state>enabled</state>
+      <default>true</default>
+      <AuthorizationRules>
+        <Rule><name>Deny</name><rank>0</rank><state>enabled</state><default>true</default><profile>DenyAccess</profile></Rule>
+      </AuthorizationRules>
+    </PolicySet>
+  </NetworkAccessPolicySets>
+  <NetworkAccessConditions>
+    <Condition>
+      <name>Wired_802.1X</name>
+      <conditionType>LibraryConditionAndBlock</conditionType>
+      <isNegate>false</isNegate>
+      <children>
+        <conditionType>ConditionAttributes</conditionType>
+        <isNegate>false</isNegate>
+        <dictionaryName>Radius</dictionaryName>
+        <attributeName>NAS-Port-Type</attributeName>
+        <operator>equals</operator>
+        <attributeValue>Ethernet</attributeValue>
+      </children>
+    </Condition>
+    <Condition>
+      <name>Unused</name>
+      <conditionType>LibraryConditionAttributes</conditionType>
+      <isNegate>false</isNegate>
+      <dictionaryName>Network Access</dictionaryName>
+      <attributeName>Protocol</attributeName>
+      <operator>equals</operator>
+      <attributeValue>TACACS</attributeValue>
+    </Condition>
+  </NetworkAccessConditions>
+  <AuthorizationProfiles>
+    <Profile><name>PermitAccess</name><accessType>ACCESS_ACCEPT</accessType></Profile>
+    <Profile><name>DenyAccess</name><accessType>ACCESS_REJECT</accessType></Profile>
+  </AuthorizationProfiles>
+</Root>
+"""
+API_POLICY_SETS = [
+    {"id": "wired", "name": "Wired", "rank": 0, "state": "enabled", "default": False, "hitCounts": 12,
+     "condition": {"conditionType": "ConditionReference", "isNegate": False, "name": "Wired_802.1X", "id": "c1"}},
+    {"id": "default", "name": "Default", "rank": 1, "state": "enabled", "default": True, "hitCounts": 3, "condition": None},
+]
+API_RULES = {
+    ("wired", "authentication"): [{"rule": {"id": "r1", "name": "Default", "rank": 0, "state": "enabled", "default": True, "hitCounts": 0}, "identitySourceName": "Internal Users"}],
+    ("wired", "authorization"): [{"rule": {"id": "r2", "name": "Permit", "rank": 0, "state": "enabled", "default": False, "hitCounts": 5}, "profile": ["PermitAccess"], "securityGroup": None}],
+    ("default", "authorization"): [{"rule": {"id": "r3", "name": "Deny", "rank": 0, "state": "enabled", "default": True, "hitCounts": 1}, "profile": ["DenyAccess"], "securityGroup": None}],
+}
+API_CONDITIONS = [
+    {"id": "c1", "name": "Wired_802.1X", "conditionType": "LibraryConditionAndBlock", "isNegate": False, "link": {"href": "https://ise/c1"}, "children": [
+        {"conditionType": "ConditionAttributes", "isNegate": False, "dictionaryName": "Radius", "attributeName": "NAS-Port-Type", "operator": "equals", "attributeValue": "Ethernet"},
+    ]},
+    {"id": "c2", "name": "Unused", "conditionType": "LibraryConditionAttributes", "isNegate": False, "dictionaryName": "Network Access",
+     "attributeName": "Protocol", "operator": "equals", "attributeValue": "TACACS"},
+]
+API_AUTHORIZATION_PROFILES = {
+    "permit": {"id": "permit", "name": "PermitAccess", "accessType": "ACCESS_ACCEPT"},
+    "deny": {"id": "deny", "name": "DenyAccess", "accessType": "ACCESS_REJECT"},
+}
+
+class MockIse:
+
+    def __init__(self, username="admin", password="Password1", reset_password=None, latency=0.0, jitter=0.0,
+                 fault_rate=0.0, alerts=1, slides=3, close_icon=True, popup_delay=0.5, export_delay=2.0):
+        self.username = username
+        self.password = password
+        self.latency = latency
+        self.jitter = jitter
+        self.fault_rate = fault_rate
+        self.alerts = alerts
+        self.slides = slides
+        self.close_icon = close_icon
+        self.popup_delay = popup_delay
+        self.export_delay = export_delay
+        self.sessions = set()
+        self.settings = {"passwordDisableUserAccountChk": True}
+        self.requests = 0
+        self.faults = 0
+        self.lock = threading.Lock()
+        self.reset(reset_password)
+
+    def reset(self, reset_password=None):
+        # With reset_password set, the next login must go through the enforced password change
+        with self.lock:
+            self.sessions.clear()
+            self.settings["passwordDisableUserAccountChk"] = True
+            self.pending_reset = reset_password
+            self.requests = 0
+            self.faults = 0
+
+    def config(self):
+        return json.dumps({
+            "alerts": self.alerts,
+            "slides": self.slides,
+            "closeIcon": self.close_icon,
+            "popupDelay": int(self.popup_delay * 1000),
+        })
+
+class MockIseHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def ise(self):
+        return self.server.ise
+
+    def session(self):
+        for cookie in self.headers.get("Cookie", "").split(";"):
+            name, _, value = cookie.strip().partition("=")
+            if name == "JSESSIONID" and value in self.ise.sessions:
+                return value
+        return None
+
+    def send(self, status, body=b"", content_type="text/html; charset=utf-8", headers=None):
+        if isinstance(body, str):
+            body = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def redirect(self, location, headers=None):
+        self.send(302, headers=dict(headers or {}, Location=location))
+
+    def form(self):
+        length = int(self.headers.get("Content-Length", "0"))
+        return {key: values[0] for key, values in parse_qs(self.rfile.read(length).decode()).items()}
+
+    def json(self):
+        length = int(self.headers.get("Content-Length", "0"))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def basicAuth(self):
+        scheme, _, value = self.headers.get("Authorization", "").partition(" ")
+        if scheme != "Basic":
+            return False
+        username, _, password = base64.b64decode(value).decode().partition(":")
+        return username == self.ise.username and password == self.ise.password
+
+    def inject(self):
+        with self.ise.lock:
+            self.ise.requests += 1
+        delay = self.ise.latency + random.uniform(0, self.ise.jitter)
+        if delay:
+            time.sleep(delay)
+        if self.ise.fault_rate and random.random() < self.ise.fault_rate:
+            with self.ise.lock:
+                self.ise.faults += 1
+            self.send(500, "Injected fault")
+            return True
+        return False
+
+    def do_GET(self):
+        if self.inject():
+            return
+        path = urlparse(self.path).path
+        if path in ("/admin/login.jsp", "/admin/login.jsp/"):
+            self.send(200, LOGIN_PAGE)
+        elif path == "/admin/resetPassword":
+            self.send(200, RESET_PAGE)
+        elif path == "/admin/logout.jsp":
+            self.ise.sessions.discard(self.session())
+            self.redirect("/admin/login.jsp")
+        elif path in ("/admin", "/admin/"):
+            if not self.session():
+                self.redirect("/admin/login.jsp")
+            else:
+                self.send(200, APP_PAGE.replace("__CONFIG__", self.ise.config()))
+        elif path == "/admin/api/view":
+            self.send(200, json.dumps({"settings": self.ise.settings}), "application/json")
+        elif path == "/admin/PolicyExport.do":
+            if not self.session():
+                self.redirect("/admin/login.jsp")
+                return
+            time.sleep(self.ise.export_delay)
+            self.send(200, POLICY_EXPORT.format(now=time.time()), "application/xml", {
+                "Content-Disposition": "attachment; filename=PolicyConfig.xml"
+            })
+        elif path.startswith("/api/v1/policy/network-access/") and self.basicAuth():
+            self.openApi(path)
+        elif path.startswith("/ers/config/") and self.basicAuth():
+            self.ers(path)
+        else:
+            self.send(404, "Not Found")
+
+    def openApi(self, path):
+        parts = path.strip("/").split("/")
+        if path.endswith("/policy-set"):
+            response = API_POLICY_SETS
+        elif len(parts) == 7 and parts[4] == "policy-set" and parts[6] in ("authentication", "authorization", "exception"):
+            response = API_RULES.get((parts[5], parts[6]), [])
+        elif path.endswith("/condition"):
+            response = API_CONDITIONS
+        elif path.endswith(("/time-condition", "/global-exception")):
+            response = []
+        else:
+            self.send(404, "Not Found")
+            return
+        self.send(200, json.dumps({"response": response, "version": "1.0.0"}), "application/json")
+
+    def ers(self, path):
+        # Authorization profiles only, every other ERS resource is empty
+        parts = path.strip("/").split("/")
+        if parts[2:] == ["op", "systemconfig", "iseversion"]:
+            result = {"resultValue": [{"value": "3.4.0.608", "name": "version"}, {"value": "0", "name": "patch information"}]}
+            self.send(200, json.dumps({"OperationResult": result}), "application/json")
+            return
+        profiles = API_AUTHORIZATION_PROFILES if parts[2] == "authorizationprofile" else {}
+        if len(parts) == 3:
+            resources = [{"id": id, "name": profile["name"]} for id, profile in profiles.items()]
+            self.send(200, json.dumps({"SearchResult": {"total": len(resources), "resources": resources}}), "application/json")
+        elif len(parts) == 4 and parts[3] in profiles:
+            self.send(200, json.dumps({"AuthorizationProfile": dict(profiles[parts[3]], link={"href": path})}), "application/json")
+        else:
+            self.send(404, "Not Found")
+
+    def do_POST(self):
+        if self.inject():
+            return
+        path = urlparse(self.path).path
+        if path == "/admin/LoginAction.do":
+            form = self.form()
+            if form.get("username") != self.ise.username:
+                self.redirect("/admin/login.jsp")
+            elif self.ise.pending_reset and form.get("password") == self.ise.pending_reset:
+                self.redirect("/admin/resetPassword")
+            elif not self.ise.pending_reset and form.get("password") == self.ise.password:
+                session = secrets.token_hex(16)
+                self.ise.sessions.add(session)
+                self.redirect("/admin/", {"Set-Cookie": f"JSESSIONID={session}; Path=/; Secure; HttpOnly"})
+            else:
+                self.redirect("/admin/login.jsp")
+        elif path == "/admin/resetPassword":
+            form = self.form()
+            if form.get("PWD") and form.get("PWD") == form.get("confirmPWD"):
+                self.ise.password = form["PWD"]
+                self.ise.pending_reset = None
+            self.redirect("/admin/login.jsp")
+        elif path == "/admin/api/settings" and self.session():
+            self.ise.settings.update(self.json())
+            self.send(200, json.dumps(self.ise.settings), "application/json")
+        else:
+            self.send(404, "Not Found")
+
+def createCertificate(folder):
+    certificate = os.path.join(folder, "mock-ise.crt")
+    key = os.path.join(folder, "mock-ise.key")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=localhost", "-keyout", key, "-out", certificate],
+        check=True, capture_output=True
+    )
+    return certificate, key
+
+def startMockIse(ise, port=0):
+    # Serves the mock over HTTPS with a throw-away self-signed certificate, returns the server
+    server = ThreadingHTTPServer(("127.0.0.1", port), MockIseHandler)
+    server.daemon_threads = True
+    server.ise = ise
+    with tempfile.TemporaryDirectory() as folder:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(*createCertificate(folder))
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Serve a local mock of the ISE admin UI")
+    parser.add_argument("--port", type=int, default=8443, help="HTTPS port to listen on")
+    parser.add_argument("--username", type=str, default="admin", help="Admin username")
+    parser.add_argument("--password", type=str, default="Password1", help="Admin password")
+    parser.add_argument("--reset-password", type=str, default="", help="Initial password that must be changed on first login")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra seconds added to every response")
+    parser.add_argument("--fault-rate", type=float, default=0.0, help="Probability of answering a request with HTTP 500")
+    parser.add_argument("--alerts", type=int, default=1, help="Number of xwtAlert pop-ups after login")
+    parser.add_argument("--slides", type=int, default=3, help="Number of ise-modal carousel slides after login")
+    parser.add_argument("--no-close-icon", action="store_true", help="Do not show the xwtCloseIcon pop-up")
+    parser.add_argument("--popup-delay", type=float, default=0.5, help="Seconds before each pop-up appears")
+    parser.add_argument("--export-delay", type=float, default=2.0, help="Seconds the policy export download takes")
+    args = parser.parse_args()
+
+    ise = MockIse(args.username, args.password, args.reset_password or None, args.latency, args.jitter, args.fault_rate,
+                  args.alerts, args.slides, not args.no_close_icon, args.popup_delay, args.export_delay)
+    server = startMockIse(ise, args.port)
+    print(f"Mock ISE listening on https://127.0.0.1:{server.server_address[1]}/admin/login.jsp")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
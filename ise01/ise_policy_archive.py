@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+
+from ise_policy_diff import iterPolicyObjects, OBJECT_DEPTH, VOLATILE_NAMES
+#
+from datetime import datetime
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+#
+
+# Every export and every canonical policy object is stored once, gzip compressed and named
+# by its sha256 (blobs/ab/abcd...gz). index.sqlite records which object hashes each export
+# contained, as change rows only, so history and point-in-time lookups are index reads.
+ARCHIVE_DIR = os.getenv("ISE_POLICY_ARCHIVE_DIR", os.path.expanduser("~/.local/share/ise01/policy-archive"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS exports (
+    id INTEGER PRIMARY KEY,
+    exported_at TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    objects INTEGER NOT NULL,
+    changes INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS exports_time ON exports (exported_at);
+-- hash is NULL when the object was removed in that export
+CREATE TABLE IF NOT EXISTS changes (
+    export_id INTEGER NOT NULL REFERENCES exports (id),
+    object TEXT NOT NULL,
+    hash TEXT,
+    PRIMARY KEY (object, export_id)
+);
+CREATE INDEX IF NOT EXISTS changes_export ON changes (export_id);
+-- latest hash of every object, what a new export is compared against
+CREATE TABLE IF NOT EXISTS current (
+    object TEXT PRIMARY KEY,
+    hash TEXT NOT NULL
+);
+"""
+
+def openArchive(archive=ARCHIVE_DIR):
+    os.makedirs(os.path.join(archive, "blobs"), exist_ok=True)
+    db = sqlite3.connect(os.path.join(archive, "index.sqlite"))
+    db.execute("PRAGMA journal_mode=WAL")
+    db.executescript(SCHEMA)
+    return db
+
+def blobPath(archive, digest):
+    return os.path.join(archive, "blobs", digest[:2], digest + ".gz")
+
+def putBlob(archive, digest, data):
+    # Content addressed, an existing blob already holds exactly this data
+    path = blobPath(archive, digest)
+    if os.path.exists(path):
+        return False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with gzip.open(path + ".tmp", "wb", compresslevel=9) as f:
+        f.write(data)
+    os.replace(path + ".tmp", path)
+    return True
+
+def getBlob(archive, digest):
+    with gzip.open(blobPath(archive, digest), "rb") as f:
+        return f.read()
+
+def fileHash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def addExport(path, archive=ARCHIVE_DIR, exported_at=None, depth=OBJECT_DEPTH, volatile=VOLATILE_NAMES):
+    # Returns the archive summary of the export. Objects are hashed as they are parsed, only
+    # the changed ones are written.
+    exported_at = exported_at or datetime.now().isoformat(timespec="seconds")
+    sha256 = fileHash(path)
+    db = openArchive(archive)
+    try:
+        last = db.execute("SELECT sha256 FROM exports ORDER BY id DESC LIMIT 1").fetchone()
+        current = dict(db.execute("SELECT object, hash FROM current"))
+        with open(path, "rb") as f:
+            putBlob(archive, sha256, f.read())
+        with db:
+            export_id = db.execute(
+                "INSERT INTO exports (exported_at, sha256, size, objects, changes) VALUES (?, ?, ?, 0, 0)",
+                (exported_at, sha256, os.path.getsize(path))
+            ).lastrowid
+            # Identical file, no need to parse it again
+            if last and last[0] == sha256:
+                db.execute("UPDATE exports SET objects = ? WHERE id = ?", (len(current), export_id))
+                return {"export": export_id, "exported_at": exported_at, "sha256": sha256, "objects": len(current), "added": [], "removed": [], "modified": []}
+            seen = set()
+            changes = {"added": [], "removed": [], "modified": []}
+            for section, key, canonical in iterPolicyObjects(path, depth, volatile):
+                name = f"{section}/{key}"
+                digest = hashlib.sha256(canonical).hexdigest()
+                seen.add(name)
+                if current.get(name) == digest:
+                    continue
+                putBlob(archive, digest, canonical)
+                changes["modified" if name in current else "added"].append(name)
+                db.execute("INSERT INTO changes (export_id, object, hash) VALUES (?, ?, ?)", (export_id, name, digest))
+                db.execute("INSERT OR REPLACE INTO current (object, hash) VALUES (?, ?)", (name, digest))
+            for name in sorted(set(current) - seen):
+                changes["removed"].append(name)
+                db.execute("INSERT INTO changes (export_id, object, hash) VALUES (?, ?, NULL)", (export_id, name))
+                db.execute("DELETE FROM current WHERE object = ?", (name,))
+            db.execute(
+                "UPDATE exports SET objects = ?, changes = ? WHERE id = ?",
+                (len(seen), sum(len(names) for names in changes.values()), export_id)
+            )
+    finally:
+        db.close()
+    return {"export": export_id, "exported_at": exported_at, "sha256": sha256, "objects": len(seen), **{kind: sorted(names) for kind, names in changes.items()}}
+
+def exportAt(db, at=None):
+    # Latest export taken at or before the ISO timestamp (or the latest one at all)
+    if at:
+        return db.execute("SELECT id, exported_at, sha256 FROM exports WHERE exported_at <= ? ORDER BY exported_at DESC, id DESC LIMIT 1", (at,)).fetchone()
+    return db.execute("SELECT id, exported_at, sha256 FROM exports ORDER BY id DESC LIMIT 1").fetchone()
+
+def objectsAt(archive=ARCHIVE_DIR, at=None, prefix=""):
+    # {object: hash} as of the export in effect at that time
+    db = openArchive(archive)
+    try:
+        export = exportAt(db, at)
+        if export is None:
+            return {}
+        rows = db.execute(
+            "SELECT c.object, c.hash FROM changes c WHERE c.object >= ? AND c.object < ? AND c.export_id = "
+            "(SELECT max(export_id) FROM changes WHERE object = c.object AND export_id <= ?)",
+            (prefix, prefix + "\uffff", export[0])
+        )
+        return {name: digest for name, digest in rows if digest is not None}
+    finally:
+        db.close()
+
+def objectAt(name, archive=ARCHIVE_DIR, at=None):
+    # Canonical XML of one object at that time, None when it did not exist
+    db = openArchive(archive)
+    try:
+        export = exportAt(db, at)
+        if export is None:
+            return None
+        row = db.execute(
+            "SELECT hash FROM changes WHERE object = ? AND export_id <= ? ORDER BY export_id DESC LIMIT 1", (name, export[0])
+        ).fetchone()
+    finally:
+        db.close()
+    if row is None or row[0] is None:
+        return None
+    return getBlob(archive, row[0])
+
+def objectHistory(name, archive=ARCHIVE_DIR):
+    # Every export in which the object appeared, changed or disappeared
+    db = openArchive(archive)
+    try:
+        rows = db.execute(
+            "SELECT e.id, e.exported_at, c.hash FROM changes c JOIN exports e ON e.id = c.export_id WHERE c.object = ? ORDER BY c.export_id",
+            (name,)
+        ).fetchall()
+    finally:
+        db.close()
+    history = []
+    for export_id, exported_at, digest in rows:
+        change = "removed" if digest is None else "added" if not history or history[-1]["change"] == "removed" else "modified"
+        history.append({"export": export_id, "exported_at": exported_at, "change": change, "hash": digest})
+    return history
+
+def exportSnapshot(archive=ARCHIVE_DIR, at=None):
+    # The original export file in effect at that time
+    db = openArchive(archive)
+    try:
+        export = exportAt(db, at)
+    finally:
+        db.close()
+    return None if export is None else getBlob(archive, export[2])
+
+def listExports(archive=ARCHIVE_DIR):
+    db = openArchive(archive)
+    try:
+        rows = db.execute("SELECT id, exported_at, sha256, size, objects, changes FROM exports ORDER BY id").fetchall()
+    finally:
+        db.close()
+    return [dict(zip(("export", "exported_at", "sha256", "size", "objects", "changes"), row)) for row in rows]
+
+def main(argv=None):
+
+    # process arguments, failover to environment variables
+    parser = argparse.ArgumentParser(description="Archive ISE PolicyConfig.xml exports and query policy object history")
+    parser.add_argument("--archive", type=str, default=ARCHIVE_DIR, help=f"Archive directory (env ISE_POLICY_ARCHIVE_DIR, default {ARCHIVE_DIR})")
+    parser.add_argument("--depth", type=int, default=OBJECT_DEPTH, help="Element depth of policy objects below the root")
+    parser.add_argument("--volatile", type=str, default="", help="Comma separated extra element/attribute names to ignore")
+    subparsers = parser.add_subparsers(dest="command")
+    addParser = subparsers.add_parser("add", help="Archive an export and index its policy objects")
+    addParser.add_argument("export")
+    addParser.add_argument("--exported-at", type=str, default="", help="ISO timestamp of the export, defaults to now")
+    addParser.add_argument("--report", type=str, default="", help="Write the change set as JSON to this file")
+    subparsers.add_parser("exports", help="List the archived exports")
+    historyParser = subparsers.add_parser("history", help="List the exports in which a policy object changed")
+    historyParser.add_argument("object", help="Object path as printed by the objects command")
+    objectsParser = subparsers.add_parser("objects", help="List policy objects and their hashes at a point in time")
+    objectsParser.add_argument("--at", type=str, default="", help="ISO timestamp, defaults to the latest export")
+    objectsParser.add_argument("--prefix", type=str, default="", help="Only objects whose path starts with this")
+    showParser = subparsers.add_parser("show", help="Print a policy object as it was at a point in time")
+    showParser.add_argument("object")
+    showParser.add_argument("--at", type=str, default="", help="ISO timestamp, defaults to the latest export")
+    snapshotParser = subparsers.add_parser("snapshot", help="Restore the export file in effect at a point in time")
+    snapshotParser.add_argument("--at", type=str, default="", help="ISO timestamp, defaults to the latest export")
+    snapshotParser.add_argument("--output", type=str, default="", help="Write the export here instead of stdout")
+    args = parser.parse_args(argv)
+    volatile = VOLATILE_NAMES | {name.strip().lower() for name in args.volatile.split(",") if name.strip()}
+
+    if args.command == "add":
+        result = addExport(args.export, args.archive, args.exported_at or None, args.depth, volatile)
+        if args.report:
+            with open(args.report, "w") as f:
+                json.dump(result, f, indent=2)
+        print(f"export {result['export']}: {result['objects']} objects, " + ", ".join(f"{len(result[kind])} {kind}" for kind in ("added", "removed", "modified")))
+    elif args.command == "exports":
+        print(json.dumps(listExports(args.archive), indent=2))
+    elif args.command == "history":
+        history = objectHistory(args.object, args.archive)
+        print(json.dumps(history, indent=2))
+        exit(0 if history else 1)
+    elif args.command == "objects":
+        print(json.dumps(objectsAt(args.archive, args.at or None, args.prefix), indent=2, sort_keys=True))
+    elif args.command == "show":
+        data = objectAt(args.object, args.archive, args.at or None)
+        if data is None:
+            print(f"{args.object} did not exist at {args.at or 'the latest export'}", file=sys.stderr)
+            exit(1)
+        sys.stdout.write(data.decode() + "\n")
+    elif args.command == "snapshot":
+        data = exportSnapshot(args.archive, args.at or None)
+        if data is None:
+            print("No export archived at that time", file=sys.stderr)
+            exit(1)
+        if args.output:
+            with open(args.output, "wb") as f:
+                f.write(data)
+        else:
+            sys.stdout.buffer.write(data)
+    else:
+        parser.print_help()
+        exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+
+from xml.etree import ElementTree as ET
+#
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+#
+
+# Policy objects are the children of the top-level sections (root > section > object)
+OBJECT_DEPTH = 2
+# Elements and attributes that change on every export without any policy change
+VOLATILE_NAMES = {
+    "timestamp", "exporttime", "exportdate", "exportedon", "generatedat", "generatedon",
+    "createdtime", "creationtime", "createdate", "lastmodified", "lastmodifiedtime",
+    "modifiedtime", "updatedtime", "lastupdate", "lastupdated", "hitcount", "hitcounts",
+}
+# Child elements or attributes identifying an object among its siblings, in order of preference
+KEY_NAMES = ("name", "Name", "id", "ID", "Id", "key")
+# Collections ISE evaluates first match first, their children keep the document order
+ORDERED_SUFFIXES = ("Rules", "PolicySets")
+# Pseudo objects: the object order of an ordered section and the attributes of the root
+ORDER_KEY = "@order"
+ROOT_ATTRIBUTES_KEY = "@attributes"
+
+def localName(tag):
+    return tag.rsplit("}", 1)[-1]
+
+def isVolatile(name, volatile):
+    return localName(name).lower() in volatile
+
+def isOrdered(tag):
+    return localName(tag).endswith(ORDERED_SUFFIXES)
+
+def elementKey(element):
+    for name in KEY_NAMES:
+        if element.get(name):
+            return element.get(name)
+    for name in KEY_NAMES:
+        child = element.find(name)
+        if child is not None and child.text and child.text.strip():
+            return child.text.strip()
+    return ""
+
+def canonicalize(element, volatile=VOLATILE_NAMES):
+    # In place: drop volatile fields, trim whitespace, sort attributes and keyed siblings.
+    # Siblings without a key and children of ordered collections keep their document order.
+    element.attrib = dict(sorted((k, v) for k, v in element.attrib.items() if not isVolatile(k, volatile)))
+    element.text = element.text.strip() if element.text and element.text.strip() else None
+    element.tail = None
+    children = [child for child in element if not isVolatile(child.tag, volatile)]
+    for child in children:
+        canonicalize(child, volatile)
+    if not isOrdered(element.tag):
+        children.sort(key=lambda child: (child.tag, elementKey(child)))
+    element[:] = children
+    return element
+
+def canonicalAttributes(element, volatile=VOLATILE_NAMES):
+    return dict(sorted((k, v) for k, v in element.attrib.items() if not isVolatile(k, volatile)))
+
+def iterPolicyObjects(path, depth=OBJECT_DEPTH, volatile=VOLATILE_NAMES):
+    # Yields (section, key, canonical bytes) for every policy object of an export. Each object
+    # is dropped from the tree as soon as it was yielded, memory does not grow with the export.
+    # Ordered sections additionally yield their object order (ORDER_KEY) once they end, and the
+    # root attributes are yielded as ROOT_ATTRIBUTES_KEY, so reordering rules is a change too.
+    stack = []
+    hadChildren = []
+    seen = {}
+    orders = {}
+    for event, element in ET.iterparse(path, events=("start", "end")):
+        if event == "start":
+            if not stack:
+                attributes = canonicalAttributes(element, volatile)
+                if attributes:
+                    yield element.tag, ROOT_ATTRIBUTES_KEY, ET.tostring(ET.Element("attributes", attributes), encoding="utf-8")
+            if hadChildren:
+                hadChildren[-1] = True
+            stack.append(element)
+            hadChildren.append(False)
+            continue
+        stack.pop()
+        isParent = hadChildren.pop()
+        level = len(stack)
+        if level == 0 or level > depth:
+            continue
+        if isVolatile(element.tag, volatile):
+            stack[-1].remove(element)
+            continue
+        # Objects, plus scalar fields above object depth (e.g. the export version)
+        if level == depth or (level < depth and not isParent):
+            section = "/".join(e.tag for e in stack)
+            canonicalize(element, volatile)
+            ET.indent(element)
+            canonical = ET.tostring(element, encoding="utf-8")
+            key = elementKey(element) or element.tag
+            if level == depth and not elementKey(element):
+                key = f"{element.tag}:{hashlib.sha256(canonical).hexdigest()[:12]}"
+            seen[(section, key)] = seen.get((section, key), 0) + 1
+            if seen[(section, key)] > 1:
+                key = f"{key}#{seen[(section, key)]}"
+            if level == depth and isOrdered(stack[-1].tag):
+                orders.setdefault(section, []).append(key)
+            yield section, key, canonical
+            stack[-1].remove(element)
+        elif level == depth - 1:
+            section = "/".join(e.tag for e in stack + [element])
+            if section in orders:
+                order = ET.Element("order")
+                for key in orders.pop(section):
+                    ET.SubElement(order, "key").text = key
+                ET.indent(order)
+                yield section, ORDER_KEY, ET.tostring(order, encoding="utf-8")
+
+def policyHashes(path, depth=OBJECT_DEPTH, volatile=VOLATILE_NAMES):
+    return {
+        f"{section}/{key}": hashlib.sha256(canonical).hexdigest()
+        for section, key, canonical in iterPolicyObjects(path, depth, volatile)
+    }
+
+def diffPolicy(oldPath, newPath, depth=OBJECT_DEPTH, volatile=VOLATILE_NAMES):
+    old = policyHashes(oldPath, depth, volatile) if oldPath and os.path.exists(oldPath) else {}
+    new = policyHashes(newPath, depth, volatile)
+    return {
+        "added": sorted(key for key in new if key not in old),
+        "removed": sorted(key for key in old if key not in new),
+        "modified": sorted(key for key in new if key in old and new[key] != old[key]),
+    }
+
+def hasChanges(changes):
+    return any(changes.values())
+
+def summarize(changes):
+    return ", ".join(f"{len(changes[kind])} {kind}" for kind in ("added", "removed", "modified"))
+
+def sectionTags(section):
+    # Section paths join the tags with "/", namespace URIs ({uri}tag) may contain "/" as well
+    return re.findall(r"\{[^}]*\}[^/]*|[^/]+", section)
+
+def startEndTags(tag, attributes=None):
+    # Namespace aware start and end tag of a wrapper element, written by ElementTree itself
+    empty = ET.tostring(ET.Element(tag, attributes or {}), encoding="unicode")
+    name = re.match(r"<([^\s/>]+)", empty).group(1)
+    return empty[:-3] + ">", f"</{name}>"
+
+def normalizePolicy(inputPath, outputPath, depth=OBJECT_DEPTH, volatile=VOLATILE_NAMES):
+    # Objects are spilled to a temporary file, only their sort keys and offsets stay in memory.
+    # Ordered sections keep the document order of their objects.
+    root = None
+    with open(inputPath, "rb") as f:
+        for event, element in ET.iterparse(f, events=("start",)):
+            root = element
+            break
+    index = []
+    with tempfile.TemporaryFile() as spill:
+        for position, (section, key, canonical) in enumerate(iterPolicyObjects(inputPath, depth, volatile)):
+            if key in (ORDER_KEY, ROOT_ATTRIBUTES_KEY):
+                continue
+            tags = sectionTags(section)
+            order = position if isOrdered(tags[-1]) and len(tags) == depth else 0
+            index.append((section, order, key, spill.tell(), len(canonical)))
+            spill.write(canonical)
+        index.sort(key=lambda entry: (sectionTags(entry[0]), entry[1], entry[2]))
+        tmpPath = outputPath + ".tmp"
+        with open(tmpPath, "wb") as out:
+            out.write(b"<?xml version='1.0' encoding='UTF-8'?>\n")
+            rootStart, rootEnd = startEndTags(root.tag, canonicalAttributes(root, volatile))
+            out.write(f"{rootStart}\n".encode())
+            openSections = [root.tag]
+            closers = [rootEnd]
+            for section, order, key, offset, length in index:
+                path = sectionTags(section)
+                common = 0
+                while common < min(len(path), len(openSections)) and path[common] == openSections[common]:
+                    common += 1
+                for closer in reversed(closers[common:]):
+                    out.write(f"{closer}\n".encode())
+                del closers[common:]
+                for tag in path[common:]:
+                    start, end = startEndTags(tag)
+                    out.write(f"{start}\n".encode())
+                    closers.append(end)
+                openSections = path
+                spill.seek(offset)
+                out.write(spill.read(length) + b"\n")
+            for closer in reversed(closers):
+                out.write(f"{closer}\n".encode())
+        os.replace(tmpPath, outputPath)
+    return outputPath
+
+def syncPolicy(newPath, targetPath, depth=OBJECT_DEPTH, volatile=VOLATILE_NAMES):
+    # Replaces targetPath with the normalized export only when a policy object changed
+    changes = diffPolicy(targetPath, newPath, depth, volatile)
+    if hasChanges(changes):
+        normalizePolicy(newPath, targetPath, depth, volatile)
+    return changes
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Normalize and diff ISE PolicyConfig.xml exports per policy object")
+    parser.add_argument("--depth", type=int, default=OBJECT_DEPTH, help="Element depth of policy objects below the root")
+    parser.add_argument("--volatile", type=str, default="", help="Comma separated extra element/attribute names to ignore")
+    subparsers = parser.add_subparsers(dest="command")
+    normalizeParser = subparsers.add_parser("normalize", help="Write a canonical copy of an export")
+    normalizeParser.add_argument("input")
+    normalizeParser.add_argument("output")
+    diffParser = subparsers.add_parser("diff", help="Print the per-object change set between two exports")
+    diffParser.add_argument("old")
+    diffParser.add_argument("new")
+    syncParser = subparsers.add_parser("sync", help="Normalize an export into target only if it changed semantically")
+    syncParser.add_argument("new")
+    syncParser.add_argument("target")
+    syncParser.add_argument("--report", type=str, default="", help="Write the change set as JSON to this file")
+    args = parser.parse_args(argv)
+    volatile = VOLATILE_NAMES | {name.strip().lower() for name in args.volatile.split(",") if name.strip()}
+
+    if args.command == "normalize":
+        normalizePolicy(args.input, args.output, args.depth, volatile)
+    elif args.command == "diff":
+        changes = diffPolicy(args.old, args.new, args.depth, volatile)
+        json.dump(changes, sys.stdout, indent=2)
+        print()
+        exit(1 if hasChanges(changes) else 0)
+    elif args.command == "sync":
+        changes = syncPolicy(args.new, args.target, args.depth, volatile)
+        if args.report:
+            with open(args.report, "w") as f:
+                json.dump(changes, f, indent=2)
+        print(summarize(changes) if hasChanges(changes) else "no changes")
+    else:
+        parser.print_help()
+        exit(1)
+
+if __name__ == "__main__":
+    main()
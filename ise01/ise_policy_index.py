@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+
+from ise_policy_diff import iterPolicyObjects, localName, sectionTags, OBJECT_DEPTH, ORDER_KEY, ROOT_ATTRIBUTES_KEY, VOLATILE_NAMES
+from ise_policy_layout import CONDITION_BLOCKS, EXPORT_FIELDS, EXPORT_ROOT, EXPORT_SECTIONS, RESULT_FIELDS, RULE_SECTIONS
+#
+from datetime import datetime
+from xml.etree import ElementTree as ET
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+#
+
+# Queryable copy of PolicyConfig.xml. The export is streamed object by object (ise_policy_diff),
+# an object is only parsed into the tables when its canonical hash changed since the last build.
+INDEX_DB = os.getenv("ISE_POLICY_INDEX", os.path.expanduser("~/.cache/ise01/policy-index.sqlite"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    object TEXT PRIMARY KEY,
+    section TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    name TEXT,
+    id TEXT,
+    hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS objects_name ON objects (name);
+CREATE INDEX IF NOT EXISTS objects_kind ON objects (kind, name);
+CREATE TABLE IF NOT EXISTS policy_sets (
+    object TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    name TEXT NOT NULL,
+    id TEXT,
+    rank INTEGER,
+    state TEXT,
+    service TEXT,
+    description TEXT
+);
+CREATE INDEX IF NOT EXISTS policy_sets_object ON policy_sets (object);
+CREATE INDEX IF NOT EXISTS policy_sets_name ON policy_sets (name);
+-- policy_set is NULL for global exception rules
+CREATE TABLE IF NOT EXISTS rules (
+    object TEXT NOT NULL,
+    policy_set TEXT,
+    type TEXT NOT NULL,
+    name TEXT NOT NULL,
+    id TEXT,
+    rank INTEGER,
+    state TEXT
+);
+CREATE INDEX IF NOT EXISTS rules_object ON rules (object);
+CREATE INDEX IF NOT EXISTS rules_set ON rules (policy_set, type, rank);
+CREATE INDEX IF NOT EXISTS rules_name ON rules (name);
+CREATE TABLE IF NOT EXISTS conditions (
+    object TEXT NOT NULL,
+    name TEXT NOT NULL,
+    id TEXT,
+    type TEXT,
+    description TEXT
+);
+CREATE INDEX IF NOT EXISTS conditions_object ON conditions (object);
+CREATE INDEX IF NOT EXISTS conditions_name ON conditions (name);
+CREATE TABLE IF NOT EXISTS results (
+    object TEXT NOT NULL,
+    policy_set TEXT,
+    rule TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_object ON results (object);
+CREATE INDEX IF NOT EXISTS results_value ON results (value);
+-- What a policy set, rule or library condition references from its conditions:
+-- kind "condition" (library condition by name) or "attribute" (name dictionary:attribute,
+-- leaf is the last ":" part of the value, e.g. the group name of an identity group path)
+CREATE TABLE IF NOT EXISTS refs (
+    object TEXT NOT NULL,
+    owner_kind TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    policy_set TEXT,
+    kind TEXT NOT NULL,
+    name TEXT,
+    operator TEXT,
+    value TEXT,
+    leaf TEXT
+);
+CREATE INDEX IF NOT EXISTS refs_object ON refs (object);
+CREATE INDEX IF NOT EXISTS refs_name ON refs (name);
+CREATE INDEX IF NOT EXISTS refs_value ON refs (value);
+CREATE INDEX IF NOT EXISTS refs_leaf ON refs (leaf);
+"""
+TABLES = ("policy_sets", "rules", "conditions", "results", "refs")
+# Bumped when the mapping changes, an index built by an older mapping is rebuilt from scratch
+INDEX_VERSION = 3
+
+def openIndex(path=INDEX_DB):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    db = sqlite3.connect(path)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.executescript(SCHEMA)
+    if db.execute("PRAGMA user_version").fetchone()[0] != INDEX_VERSION:
+        with db:
+            for table in TABLES + ("objects",):
+                db.execute(f"DELETE FROM {table}")
+        db.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+    return db
+
+def field(element, *paths):
+    # First non-empty text among the paths
+    for path in paths:
+        value = element.findtext(path)
+        if value:
+            return value
+    return None
+
+def rank(element):
+    value = field(element, "rank")
+    return int(value) if value and value.lstrip("-").isdigit() else None
+
+def conditionRefs(condition, library=False):
+    # Yields (kind, name, operator, value) for a condition tree. For a library condition
+    # (library=True) the root is the condition itself, its name is not a reference.
+    if condition is None:
+        return
+    conditionType = field(condition, "conditionType")
+    if field(condition, "attributeName"):
+        name = ":".join(part for part in (field(condition, "dictionaryName"), field(condition, "attributeName")) if part)
+        yield "attribute", name, field(condition, "operator"), field(condition, "attributeValue")
+    elif not library and conditionType not in CONDITION_BLOCKS and field(condition, "name"):
+        yield "condition", field(condition, "name"), None, field(condition, "id")
+    for child in condition.iterfind("children"):
+        yield from conditionRefs(child)
+
+def ruleResults(rule):
+    # Yields (kind, value), a list field repeats its element once per value
+    for tag, kind in RESULT_FIELDS.items():
+        for element in rule.iterfind(tag):
+            if element.text:
+                yield kind, element.text
+
+def indexRefs(db, name, ownerKind, owner, policySet, condition):
+    for kind, refName, operator, value in conditionRefs(condition, library=ownerKind == "condition"):
+        leaf = value.rsplit(":", 1)[-1] if value else None
+        db.execute(
+            "INSERT INTO refs (object, owner_kind, owner, policy_set, kind, name, operator, value, leaf) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (name, ownerKind, owner, policySet, kind, refName, operator, value, leaf)
+        )
+
+def indexRule(db, name, rule, ruleType, policySet=None):
+    ruleName = field(rule, "name") or "?"
+    db.execute(
+        "INSERT INTO rules (object, policy_set, type, name, id, rank, state) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (name, policySet, ruleType, ruleName, field(rule, "id"), rank(rule), field(rule, "state"))
+    )
+    for kind, value in ruleResults(rule):
+        db.execute("INSERT INTO results (object, policy_set, rule, kind, value) VALUES (?, ?, ?, ?, ?)", (name, policySet, ruleName, kind, value))
+    indexRefs(db, name, "rule", ruleName, policySet, rule.find("condition"))
+
+def objectKind(section, element):
+    # Kind of an object from the PolicyConfig.xml layout, None when the layout does not know it
+    tags = [localName(tag) for tag in sectionTags(section)]
+    if tags[0] != EXPORT_ROOT:
+        return None
+    if len(tags) == 1:
+        return "field" if localName(element.tag) in EXPORT_FIELDS else None
+    objectTag, kind = EXPORT_SECTIONS.get(tags[1], (None, None))
+    return kind if len(tags) == 2 and localName(element.tag) == objectTag else None
+
+def indexObject(db, name, kind, section, element):
+    # Fills the query tables for one policy object, the caller removed its previous rows
+    objectName = field(element, "name")
+    if kind == "policy-set":
+        domain = "device-admin" if "DeviceAdmin" in section else "network-access"
+        db.execute(
+            "INSERT INTO policy_sets (object, domain, name, id, rank, state, service, description) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (name, domain, objectName or "?", field(element, "id"), rank(element), field(element, "state"), field(element, "serviceName"), field(element, "description"))
+        )
+        indexRefs(db, name, "policy-set", objectName or "?", objectName, element.find("condition"))
+        for tag, ruleType in RULE_SECTIONS.items():
+            for rule in element.iterfind(f"{tag}/Rule"):
+                indexRule(db, name, rule, ruleType, objectName)
+    elif kind == "rule":
+        indexRule(db, name, element, "global-exception")
+    elif kind == "condition":
+        db.execute(
+            "INSERT INTO conditions (object, name, id, type, description) VALUES (?, ?, ?, ?, ?)",
+            (name, objectName or "?", field(element, "id"), field(element, "conditionType"), field(element, "description"))
+        )
+        indexRefs(db, name, "condition", objectName or "?", None, element)
+    return objectName
+
+def buildIndex(exportPath, path=INDEX_DB, depth=OBJECT_DEPTH, volatile=VOLATILE_NAMES):
+    # Returns counts of added/updated/removed/unchanged objects. An export with sections or
+    # objects outside the PolicyConfig.xml layout is rejected, they would never be queryable.
+    start = datetime.now()
+    db = openIndex(path)
+    counts = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+    try:
+        known = dict(db.execute("SELECT object, hash FROM objects"))
+        seen = set()
+        unknown = set()
+        with db:
+            for section, key, canonical in iterPolicyObjects(exportPath, depth, volatile):
+                # Object order and root attributes have nothing to query
+                if key in (ORDER_KEY, ROOT_ATTRIBUTES_KEY):
+                    continue
+                name = f"{section}/{key}"
+                digest = hashlib.sha256(canonical).hexdigest()
+                element = ET.fromstring(canonical)
+                kind = objectKind(section, element)
+                if kind is None:
+                    unknown.add(f"{section}/{localName(element.tag)}")
+                    continue
+                seen.add(name)
+                if known.get(name) == digest:
+                    counts["unchanged"] += 1
+                    continue
+                counts["updated" if name in known else "added"] += 1
+                for table in TABLES:
+                    db.execute(f"DELETE FROM {table} WHERE object = ?", (name,))
+                objectName = indexObject(db, name, kind, section, element)
+                db.execute(
+                    "INSERT OR REPLACE INTO objects (object, section, kind, name, id, hash) VALUES (?, ?, ?, ?, ?, ?)",
+                    (name, section, kind, objectName, field(element, "id"), digest)
+                )
+            if unknown:
+                # Rolls back the whole build, the index keeps the previous export
+                raise Exception(f"{exportPath} does not match the PolicyConfig.xml layout (ise_policy_layout), unknown: {', '.join(sorted(unknown))} at {datetime.now()}")
+            for name in set(known) - seen:
+                counts["removed"] += 1
+                for table in TABLES + ("objects",):
+                    db.execute(f"DELETE FROM {table} WHERE object = ?", (name,))
+    finally:
+        db.close()
+    counts["seconds"] = round((datetime.now() - start).total_seconds(), 3)
+    return counts
+
+def query(sql, params=(), path=INDEX_DB):
+    db = openIndex(path)
+    db.row_factory = sqlite3.Row
+    db.execute("PRAGMA query_only = ON")
+    try:
+        return [dict(row) for row in db.execute(sql, params)]
+    finally:
+        db.close()
+
+def findReferences(target, path=INDEX_DB):
+    # Every policy set, rule and condition whose conditions or results mention target, either as
+    # a library condition, an attribute, a full attribute value or its last path element
+    return query(
+        "SELECT owner_kind, owner, policy_set, kind, name, operator, value FROM refs WHERE name = :target OR value = :target OR leaf = :target "
+        "UNION ALL SELECT 'rule', rule, policy_set, kind, NULL, NULL, value FROM results WHERE value = :target "
+        "ORDER BY 3, 2",
+        {"target": target}, path
+    )
+
+def listPolicySets(domain=None, path=INDEX_DB):
+    return query(
+        "SELECT domain, name, rank, state, service, (SELECT count(*) FROM rules r WHERE r.object = p.object) AS rules "
+        "FROM policy_sets p WHERE :domain IS NULL OR domain = :domain ORDER BY domain, rank",
+        {"domain": domain}, path
+    )
+
+def listRules(policySet=None, ruleType=None, path=INDEX_DB):
+    return query(
+        "SELECT r.policy_set, r.type, r.rank, r.name, r.state, "
+        "(SELECT group_concat(kind || '=' || value, ', ') FROM results s WHERE s.object = r.object AND s.rule = r.name) AS results "
+        "FROM rules r WHERE (:set IS NULL OR r.policy_set = :set) AND (:type IS NULL OR r.type = :type) "
+        "ORDER BY (SELECT p.rank FROM policy_sets p WHERE p.object = r.object), r.policy_set, r.type, r.rank",
+        {"set": policySet, "type": ruleType}, path
+    )
+
+def listConditions(unused=False, path=INDEX_DB):
+    rows = query(
+        "SELECT c.name, c.type, (SELECT count(*) FROM refs f WHERE f.kind = 'condition' AND f.name = c.name) AS used "
+        "FROM conditions c ORDER BY c.name",
+        path=path
+    )
+    return [row for row in rows if row["used"] == 0] if unused else rows
+
+def main(argv=None):
+
+    # process arguments, failover to environment variables
+    parser = argparse.ArgumentParser(description="Index ISE PolicyConfig.xml in SQLite and query policy sets, rules, conditions and references")
+    parser.add_argument("--db", type=str, default=INDEX_DB, help=f"Index database (env ISE_POLICY_INDEX, default {INDEX_DB})")
+    parser.add_argument("--depth", type=int, default=OBJECT_DEPTH, help="Element depth of policy objects below the root")
+    parser.add_argument("--volatile", type=str, default="", help="Comma separated extra element/attribute names to ignore")
+    subparsers = parser.add_subparsers(dest="command")
+    buildParser = subparsers.add_parser("build", help="Index an export, only objects changed since the last build are re-parsed")
+    buildParser.add_argument("export")
+    setsParser = subparsers.add_parser("policy-sets", help="List policy sets")
+    setsParser.add_argument("--domain", type=str, choices=["network-access", "device-admin"], default=None)
+    rulesParser = subparsers.add_parser("rules", help="List rules with their results in evaluation order")
+    rulesParser.add_argument("--policy-set", type=str, default=None)
+    rulesParser.add_argument("--type", type=str, choices=sorted(set(RULE_SECTIONS.values()) | {"global-exception"}), default=None)
+    refsParser = subparsers.add_parser("references", help="Find everything referencing a condition, group, profile or attribute value")
+    refsParser.add_argument("target")
+    conditionsParser = subparsers.add_parser("conditions", help="List library conditions with their usage count")
+    conditionsParser.add_argument("--unused", action="store_true", help="Only conditions no policy set, rule or condition references")
+    sqlParser = subparsers.add_parser("sql", help="Run a read-only SQL query against the index")
+    sqlParser.add_argument("query")
+    args = parser.parse_args(argv)
+    volatile = VOLATILE_NAMES | {name.strip().lower() for name in args.volatile.split(",") if name.strip()}
+
+    if args.command == "build":
+        counts = buildIndex(args.export, args.db, args.depth, volatile)
+        print(", ".join(f"{value} {key}" for key, value in counts.items() if key != "seconds") + f" in {counts['seconds']}s")
+        return
+    if args.command == "policy-sets":
+        rows = listPolicySets(args.domain, args.db)
+    elif args.command == "rules":
+        rows = listRules(args.policy_set, args.type, args.db)
+    elif args.command == "references":
+        rows = findReferences(args.target, args.db)
+    elif args.command == "conditions":
+        rows = listConditions(args.unused, args.db)
+    elif args.command == "sql":
+        try:
+            rows = query(args.query, path=args.db)
+        except sqlite3.Error as e:
+            print(f"Query failed: {e}", file=sys.stderr)
+            exit(1)
+    else:
+        parser.print_help()
+        exit(1)
+    print(json.dumps(rows, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+# Layout of PolicyConfig.xml as the Admin UI writes it (Administration > System > Backup &
+# Restore > Policy Export, no encryption). ise_api builds the same document from ERS/OpenAPI
+# and ise_policy_index reads it, so both export modes are tracked and queried alike:
+#
+#   <Root>
+#     <version>3.4.0.608</version>
+#     <exportTime>...</exportTime>
+#     <NetworkAccessPolicySets>
+#       <PolicySet>
+#         <name>Wired</name> <rank>0</rank> <state>enabled</state> <condition>...</condition>
+#         <AuthenticationRules><Rule>...</Rule></AuthenticationRules>
+#         <AuthorizationRules><Rule><name>Permit</name> <rank>0</rank> <profile>PermitAccess</profile></Rule></AuthorizationRules>
+#       </PolicySet>
+#     </NetworkAccessPolicySets>
+#     <AuthorizationProfiles><Profile><name>PermitAccess</name> ...</Profile></AuthorizationProfiles>
+#   </Root>
+#
+# Objects carry their fields as child elements, a list field repeats its element once per
+# value (one <profile> per profile) and a condition tree nests one <children> per child
+# condition. Sections without objects are left out.
+EXPORT_ROOT = "Root"
+# Scalar fields of the root
+EXPORT_FIELDS = ("version", "exportTime")
+# Top-level section -> (object element, object kind)
+EXPORT_SECTIONS = {
+    "NetworkAccessPolicySets": ("PolicySet", "policy-set"),
+    "DeviceAdminPolicySets": ("PolicySet", "policy-set"),
+    "NetworkAccessGlobalExceptionRules": ("Rule", "rule"),
+    "DeviceAdminGlobalExceptionRules": ("Rule", "rule"),
+    "NetworkAccessConditions": ("Condition", "condition"),
+    "NetworkAccessTimeAndDateConditions": ("Condition", "condition"),
+    "DeviceAdminConditions": ("Condition", "condition"),
+    "DeviceAdminTimeAndDateConditions": ("Condition", "condition"),
+    "AuthorizationProfiles": ("Profile", "authorization-profile"),
+    "DownloadableAcls": ("DownloadableAcl", "downloadable-acl"),
+    "AllowedProtocols": ("AllowedProtocol", "allowed-protocols"),
+    "EndpointIdentityGroups": ("EndpointGroup", "endpoint-group"),
+    "UserIdentityGroups": ("IdentityGroup", "user-group"),
+    "NetworkDeviceGroups": ("NetworkDeviceGroup", "network-device-group"),
+    "TacacsProfiles": ("TacacsProfile", "tacacs-profile"),
+    "TacacsCommandSets": ("TacacsCommandSet", "tacacs-command-set"),
+}
+# Rule collections of a PolicySet and the rule type they hold
+RULE_SECTIONS = {
+    "AuthenticationRules": "authentication",
+    "AuthorizationRules": "authorization",
+    "LocalExceptionRules": "local-exception",
+}
+# Rule fields naming what the rule hands out
+RESULT_FIELDS = {
+    "profile": "profile",
+    "securityGroup": "security-group",
+    "identitySourceName": "identity-source",
+    "commands": "command-set",
+}
+# Condition types that only group their <children>
+CONDITION_BLOCKS = {"ConditionAndBlock", "ConditionOrBlock", "LibraryConditionAndBlock", "LibraryConditionOrBlock"}
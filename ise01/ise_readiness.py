@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+#
+from datetime import datetime
+from time import monotonic
+import argparse
+import json
+import logging
+import os
+import random
+import socket
+import ssl
+import sys
+import threading
+#
+
+LOGGER = logging.getLogger("selenium")
+
+# A probe only starts once the probe it depends on has passed, e.g. Chrome is not launched
+# against a node that does not even answer HTTP yet. Independent probes run concurrently.
+PROBES = ["tcp:22", "tcp:443", "tls:443", "http", "login-form"]
+PROBE_DEPENDS = {
+    "tls:443": "tcp:443",
+    "http": "tls:443",
+    "login-form": "http",
+}
+
+def insecureContext():
+    # ISE serves a self-signed certificate until one is imported
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return context
+
+def probeTcp(host, port, timeout=5):
+    with socket.create_connection((host, port), timeout=timeout):
+        return f"port {port} open"
+
+def probeTls(host, port, timeout=5):
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        with insecureContext().wrap_socket(sock, server_hostname=host) as tls:
+            return f"{tls.version()} {tls.cipher()[0]}"
+
+def probeHttp(host, timeout=10):
+    request = Request(f"https://{host}/admin/login.jsp")
+    try:
+        with urlopen(request, context=insecureContext(), timeout=timeout) as response:
+            status = response.status
+    except HTTPError as e:
+        status = e.code
+    if status != 200:
+        raise Exception(f"login.jsp returned {status}")
+    return "login.jsp returned 200"
+
+class LoginFormProbe:
+    # Keeps one browser for all attempts, selenium is only imported when this probe runs
+    def __init__(self, host):
+        self.host = host
+        self.driver = None
+
+    def __call__(self, timeout=30):
+        from ise_utils import getDriver, iseLogin
+        if self.driver is None:
+            self.driver = getDriver()
+        self.driver.get(f"https://{self.host}/admin/login.jsp")
+        if not iseLogin(self.driver, check_mode=True, timeout=timeout):
+            raise Exception("login form is not interactive")
+        return "login form interactive"
+
+    def close(self):
+        if self.driver is not None:
+            self.driver.quit()
+            self.driver = None
+
+def getProbe(host, name):
+    if name.startswith("tcp:"):
+        return lambda: probeTcp(host, int(name.split(":", 1)[1]))
+    if name.startswith("tls:"):
+        return lambda: probeTls(host, int(name.split(":", 1)[1]))
+    if name == "http":
+        return lambda: probeHttp(host)
+    if name == "login-form":
+        return LoginFormProbe(host)
+    raise Exception(f"Unknown readiness probe {name} at {datetime.now()}")
+
+def runProbe(name, probe, result, deadline, passed, failed, depends=None, initial=1, maximum=30, factor=2, consecutive=1):
+    if depends is not None:
+        while not depends.wait(1):
+            if failed.is_set() or monotonic() > deadline:
+                result["error"] = "dependency not ready"
+                return
+    start = monotonic()
+    delay = initial
+    streak = 0
+    while not failed.is_set():
+        result["attempts"] += 1
+        try:
+            result["detail"] = probe()
+            result["error"] = None
+            streak += 1
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+            streak = 0
+            if result["attempts"] == 1 or result["attempts"] % 10 == 0:
+                LOGGER.info(f"{name} not ready yet ({result['error']}), attempt {result['attempts']}")
+        if streak >= consecutive:
+            result["ok"] = True
+            result["seconds"] = round(monotonic() - start, 3)
+            LOGGER.info(f"{name} ready after {result['seconds']:.1f}s ({result['attempts']} attempts): {result['detail']}")
+            passed.set()
+            return
+        remaining = deadline - monotonic()
+        if remaining <= 0:
+            return
+        # Exponential backoff with jitter, a success streak is confirmed at the initial interval
+        if streak:
+            wait = initial
+        else:
+            wait = min(maximum, delay) * random.uniform(0.8, 1.2)
+            delay *= factor
+        failed.wait(min(wait, remaining))
+
+def waitForReady(host, probes=None, timeout=3600, initial=1, maximum=30, factor=2, consecutive=1):
+    # Returns a structured result, result["ready"] is True once every probe has passed
+    probes = probes or PROBES
+    deadline = monotonic() + timeout
+    start = monotonic()
+    failed = threading.Event()
+    passed = {name: threading.Event() for name in probes}
+    results = {name: {"ok": False, "attempts": 0, "seconds": None, "detail": None, "error": None} for name in probes}
+    callables = {name: getProbe(host, name) for name in probes}
+    threads = []
+    for name in probes:
+        depends = passed.get(PROBE_DEPENDS.get(name))
+        thread = threading.Thread(
+            target=runProbe,
+            name=f"probe-{name}",
+            args=(name, callables[name], results[name], deadline, passed[name], failed, depends, initial, maximum, factor, consecutive),
+            daemon=True,
+        )
+        thread.start()
+        threads.append(thread)
+    try:
+        for thread in threads:
+            thread.join()
+    finally:
+        failed.set()
+        for probe in callables.values():
+            if hasattr(probe, "close"):
+                probe.close()
+    return {
+        "host": host,
+        "ready": all(result["ok"] for result in results.values()),
+        "seconds": round(monotonic() - start, 3),
+        "checked_at": datetime.now().isoformat(),
+        "probes": results,
+    }
+
+def main(argv=None):
+
+    # process arguments, failover to environment variables
+    parser = argparse.ArgumentParser(description="Wait until an ISE node is reachable and its admin UI is ready")
+    parser.add_argument("--host", type=str, default=os.getenv("ISE_HOST", ""), help="Cisco ISE hostname or IP address (env ISE_HOST) (required)")
+    parser.add_argument("--probes", type=str, default=os.getenv("ISE_READY_PROBES", ",".join(PROBES)), help=f"Comma separated probes, tcp:<port>, tls:<port>, http, login-form (env ISE_READY_PROBES, default {','.join(PROBES)})")
+    parser.add_argument("--timeout", type=int, default=int(os.getenv("ISE_READY_TIMEOUT", "3600")), help="Seconds to wait for all probes (env ISE_READY_TIMEOUT)")
+    parser.add_argument("--max-interval", type=float, default=30, help="Upper bound of the backoff between attempts in seconds")
+    parser.add_argument("--consecutive", type=int, default=1, help="Successful attempts in a row a probe needs to pass")
+    parser.add_argument("--report", type=str, default="", help="Write the result as JSON to this file")
+    args = parser.parse_args(argv)
+    probes = [probe.strip() for probe in args.probes.split(",") if probe.strip()]
+
+    if not args.host or not probes:
+        parser.print_help()
+        exit(1)
+
+    if not LOGGER.handlers:
+        LOGGER.setLevel(logging.INFO)
+        LOGGER.addHandler(logging.StreamHandler(stream=sys.stdout))
+    result = waitForReady(args.host, probes, args.timeout, maximum=args.max_interval, consecutive=args.consecutive)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(result, f, indent=2)
+    print(json.dumps(result, indent=2))
+    exit(0 if result["ready"] else 1)
+
+if __name__ == "__main__":
+    main()
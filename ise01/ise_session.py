@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+#
+from ise_forensics import isFailure
+from ise_utils import getChromeDriverPath, getChromeOptions, prepareDriver, setDownloadBehavior, iseLogin, iseLogout, isePostLoginPopUps, iseSessionAlive, LOGGER, waitForUrl
+#
+from contextlib import contextmanager
+from datetime import datetime
+from time import sleep, time
+import argparse
+import fcntl
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+#
+
+# Warm, logged-in browsers are kept alive between script runs by detached chromedriver
+# processes. Their connection details are recorded here, keyed by "username@host". The state
+# lock is never held while a browser starts or logs in, the entry is leased (or reserved with
+# pid None) first and filled in once the login is done.
+SESSION_STATE = os.getenv("ISE_SESSION_STATE", os.path.expanduser("~/.cache/ise01/sessions.json"))
+# ISE drops idle admin GUI sessions on its own, do not hand out anything older than this
+SESSION_MAX_IDLE = int(os.getenv("ISE_SESSION_MAX_IDLE", "1800"))
+
+class AttachedDriver(webdriver.Remote):
+    # Remote driver that attaches to an already running session instead of creating a new one
+    def __init__(self, command_executor, session_id, capabilities):
+        self._attachSessionId = session_id
+        self._attachCapabilities = capabilities
+        super().__init__(command_executor=command_executor, options=Options())
+
+    def start_session(self, capabilities):
+        self.session_id = self._attachSessionId
+        self.caps = self._attachCapabilities
+
+@contextmanager
+def lockedState():
+    os.makedirs(os.path.dirname(SESSION_STATE), exist_ok=True)
+    with open(SESSION_STATE + ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            with open(SESSION_STATE) as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            state = {}
+        yield state
+        with open(SESSION_STATE + ".tmp", "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(SESSION_STATE + ".tmp", SESSION_STATE)
+
+def sessionKey(host, username):
+    return f"{username}@{host}"
+
+def isProcessAlive(pid):
+    try:
+        os.kill(pid, 0)
+    except (ProcessLookupError, PermissionError):
+        return False
+    return True
+
+def startChromeDriver(timeout=10):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    LOGGER.info(f"Starting detached ChromeDriver on port {port}...")
+    # Own session so the chromedriver (and its Chrome) outlives the script that started it
+    process = subprocess.Popen(
+        [getChromeDriverPath(), f"--port={port}"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True
+    )
+    start = time()
+    while time() - start < timeout:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            LOGGER.info("Detached ChromeDriver started.")
+            return process.pid, port
+        except OSError:
+            sleep(0.05)
+    process.kill()
+    LOGGER.error("Detached ChromeDriver did not start at %s", datetime.now())
+    raise Exception(f"Detached ChromeDriver did not start at {datetime.now()}")
+
+def attachDriver(entry):
+    if not entry["pid"] or not isProcessAlive(entry["pid"]):
+        return None
+    try:
+        return AttachedDriver(f"http://127.0.0.1:{entry['port']}", entry["session_id"], entry.get("capabilities", {}))
+    except WebDriverException:
+        return None
+
+def iseSessionValid(driver, timeout=10):
+    try:
+        if "login.jsp" in driver.current_url or "/admin" not in driver.current_url:
+            return False
+    except WebDriverException:
+        return False
+    return iseSessionAlive(driver, timeout)
+
+def discardEntry(entry, logout=False):
+    driver = attachDriver(entry)
+    if driver:
+        try:
+            if logout:
+                iseLogout(driver)
+        except Exception:
+            LOGGER.info("Logout of pooled session failed, closing it anyway.")
+        try:
+            driver.quit()
+        except WebDriverException:
+            pass
+    if entry["pid"] and isProcessAlive(entry["pid"]):
+        os.kill(entry["pid"], signal.SIGTERM)
+
+def dropLease(key):
+    with lockedState() as state:
+        if key in state and state[key].get("leased_by") == os.getpid():
+            del state[key]
+
+def acquireDriver(host, username, password, download_path=None, timeout=60):
+    key = sessionKey(host, username)
+    with lockedState() as state:
+        entry = state.get(key)
+        leased = not (entry and entry.get("leased_by") and entry["leased_by"] != os.getpid() and isProcessAlive(entry["leased_by"]))
+        if leased:
+            entry = dict(entry or {"pid": None, "port": None, "session_id": None, "capabilities": {}}, leased_by=os.getpid())
+            state[key] = entry
+        else:
+            LOGGER.info(f"Pooled session {key} is in use by process {entry['leased_by']}, starting a new one.")
+
+    if leased and entry["pid"]:
+        driver = None
+        # A reserved entry has no last_used yet
+        if entry.get("last_used") and time() - entry["last_used"] <= SESSION_MAX_IDLE:
+            driver = attachDriver(entry)
+        if driver and iseSessionValid(driver):
+            LOGGER.info(f"Reusing pooled session {key}.")
+            setDownloadBehavior(driver, download_path)
+            with lockedState() as state:
+                state[key] = dict(entry, last_used=time())
+            return driver
+        LOGGER.info(f"Pooled session {key} is no longer valid, discarding it.")
+        discardEntry(entry)
+
+    pid, port = startChromeDriver()
+    try:
+        driver = webdriver.Remote(command_executor=f"http://127.0.0.1:{port}", options=getChromeOptions(download_path))
+        prepareDriver(driver, download_path)
+        waitForUrl(driver, f"https://{host}/admin/login.jsp")
+        iseLogin(driver, username, password, timeout=timeout)
+        isePostLoginPopUps(driver)
+    except BaseException:
+        os.kill(pid, signal.SIGTERM)
+        if leased:
+            dropLease(key)
+        raise
+    if leased:
+        with lockedState() as state:
+            state[key] = {
+                "pid": pid,
+                "port": port,
+                "session_id": driver.session_id,
+                "capabilities": driver.caps,
+                "leased_by": os.getpid(),
+                "last_used": time(),
+            }
+    else:
+        # Slot taken by a session in use elsewhere, this browser lives only for the lease
+        driver.isePooledPid = pid
+    return driver
+
+def releaseDriver(driver, keep=None):
+    # Called from the finally of the scripts, by default a session is only kept when the
+    # script did not fail, a failed step may have left the browser anywhere
+    if driver is None:
+        return
+    if keep is None:
+        keep = not isFailure(*sys.exc_info()[:2])
+    pooled = None
+    with lockedState() as state:
+        for key, entry in list(state.items()):
+            if entry["session_id"] != driver.session_id:
+                continue
+            if keep:
+                LOGGER.info(f"Returning session {key} to the pool.")
+                entry["leased_by"] = None
+                entry["last_used"] = time()
+                return
+            pooled = state.pop(key)
+            break
+    if pooled:
+        # Out of the pool already, the logout does not hold the state lock
+        LOGGER.info(f"Closing pooled session {key}...")
+        discardEntry(pooled, logout=True)
+        return
+    # Not pooled, close it like a regular driver
+    try:
+        iseLogout(driver)
+    except Exception:
+        if keep:
+            raise
+        LOGGER.info("Logout after the failure failed, closing the browser anyway.")
+    finally:
+        driver.quit()
+        if getattr(driver, "isePooledPid", None):
+            os.kill(driver.isePooledPid, signal.SIGTERM)
+
+def closeSessions(host=None):
+    with lockedState() as state:
+        closing = {key: state.pop(key) for key in list(state) if not host or key.endswith(f"@{host}")}
+    for key, entry in closing.items():
+        LOGGER.info(f"Closing pooled session {key}...")
+        discardEntry(entry, logout=True)
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Manage warm, logged-in ISE browser sessions shared across scripts")
+    parser.add_argument("--list", action="store_true", help="List pooled sessions")
+    parser.add_argument("--close", action="store_true", help="Logout and close pooled sessions")
+    parser.add_argument("--host", type=str, default="", help="Limit --close to a single Cisco ISE host")
+    args = parser.parse_args()
+
+    if args.close:
+        closeSessions(args.host)
+    elif args.list:
+        with lockedState() as state:
+            for key, entry in state.items():
+                idle = f"{int(time() - entry['last_used'])}s" if entry.get("last_used") else "-"
+                print(f"{key} pid={entry.get('pid')} port={entry.get('port')} idle={idle} leased_by={entry.get('leased_by')}")
+    else:
+        parser.print_help()
+        exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+
+from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.select import Select
+from selenium.webdriver.support.wait import WebDriverWait
+#
+from ise_trace import traceSpan
+from ise_utils import LOGGER, waitForClick, waitForUrl
+#
+from datetime import datetime
+import json
+import os
+#
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SETTINGS_FILE = os.path.join(SCRIPT_DIR, "ise-settings.json")
+
+# Waits until all requested elements exist (the ISE views render them from XHRs) and reads
+# their current state, so a whole tab costs one WebDriver round-trip.
+SETTINGS_STATE_SCRIPT = """
+var ids = arguments[0], timeoutMs = arguments[1];
+var done = arguments[arguments.length - 1];
+function read() {
+    var state = {};
+    ids.forEach(function (id) {
+        var element = document.getElementById(id);
+        if (!element) {
+            state[id] = null;
+        } else if (element.type === "checkbox" || element.type === "radio") {
+            state[id] = {kind: element.type, value: element.checked};
+        } else if (element.tagName === "SELECT") {
+            state[id] = {kind: "select", value: element.value};
+        } else {
+            state[id] = {kind: "text", value: element.value};
+        }
+    });
+    return state;
+}
+function complete(state) {
+    return ids.every(function (id) { return state[id] !== null; });
+}
+var state = read();
+if (complete(state)) { done(state); return; }
+var timer = null;
+var observer = new MutationObserver(function () {
+    var state = read();
+    if (complete(state)) { observer.disconnect(); clearTimeout(timer); done(state); }
+});
+observer.observe(document.documentElement, {childList: true, subtree: true});
+timer = setTimeout(function () { observer.disconnect(); done(read()); }, timeoutMs);
+"""
+
+def loadSettings(path=None):
+    # Settings file: {"settings": [{"name", "route", "tab", "element", "state", "save"}, ...]}
+    # route is the ISE SPA hash route, tab the label of the tab holding the element (optional),
+    # state the desired checkbox state, select value or text, save the id of the tab's save button.
+    # A radio button can only be selected (state true), it is unset by selecting another one.
+    with open(path or SETTINGS_FILE) as f:
+        settings = json.load(f)["settings"]
+    for setting in settings:
+        missing = [key for key in ("name", "route", "element", "state", "save") if key not in setting]
+        if missing:
+            raise Exception(f"Setting {setting.get('name', setting)} is missing {', '.join(missing)} at {datetime.now()}")
+    return settings
+
+def groupSettings(settings):
+    # route -> (tab, save button) -> settings, in file order
+    pages = {}
+    for setting in settings:
+        tabs = pages.setdefault(setting["route"], {})
+        tabs.setdefault((setting.get("tab"), setting["save"]), []).append(setting)
+    return pages
+
+def getSetting(name, path=None):
+    for setting in loadSettings(path):
+        if setting["name"] == name:
+            return setting
+    raise Exception(f"Setting {name} not found in {path or SETTINGS_FILE} at {datetime.now()}")
+
+def xpathLiteral(text):
+    # XPath 1.0 has no escapes, a text with both quote kinds is built with concat()
+    if "'" not in text:
+        return f"'{text}'"
+    if '"' not in text:
+        return f'"{text}"'
+    return "concat(" + ", \"'\", ".join(f"'{part}'" for part in text.split("'")) + ")"
+
+def openTab(driver, tab, timeout=10):
+    tabXpath = f"//span[text()={xpathLiteral(tab)}]"
+    try:
+        WebDriverWait(driver, timeout).until(
+            EC.all_of(
+                EC.presence_of_element_located((By.XPATH, tabXpath)),
+                EC.element_to_be_clickable((By.XPATH, tabXpath))
+            )
+        )
+    except (TimeoutException, NoSuchElementException):
+        LOGGER.error(f"Tab {tab} not found at {datetime.now()}")
+        raise Exception(f"Tab {tab} not found at {datetime.now()}")
+    LOGGER.info(f"Opening {tab} tab...")
+    driver.find_element(By.XPATH, tabXpath).click()
+
+def readSettingsState(driver, elements, timeout=10):
+    state = driver.execute_async_script(SETTINGS_STATE_SCRIPT, elements, int(timeout * 1000))
+    missing = [element for element in elements if state.get(element) is None]
+    if missing:
+        LOGGER.error(f"Elements {', '.join(missing)} not found at {datetime.now()}")
+        raise Exception(f"Elements {', '.join(missing)} not found at {datetime.now()}")
+    return state
+
+def settingDiffers(current, desired):
+    if current["kind"] in ("checkbox", "radio"):
+        return bool(current["value"]) != bool(desired)
+    return str(current["value"]) != str(desired)
+
+def setElement(driver, current, element, desired):
+    target = driver.find_element(By.ID, element)
+    if current["kind"] == "radio" and not desired:
+        LOGGER.error(f"Radio button {element} cannot be unset, select another radio button of its group at {datetime.now()}")
+        raise Exception(f"Radio button {element} cannot be unset, select another radio button of its group at {datetime.now()}")
+    if current["kind"] in ("checkbox", "radio"):
+        target.click()
+    elif current["kind"] == "select":
+        Select(target).select_by_value(str(desired))
+    else:
+        target.clear()
+        target.send_keys(str(desired))
+
+def applyTab(driver, tab, save, settings, check_mode=False, timeout=10):
+    if tab:
+        openTab(driver, tab, timeout)
+    state = readSettingsState(driver, [setting["element"] for setting in settings], timeout)
+    results = []
+    for setting in settings:
+        current = state[setting["element"]]
+        changed = settingDiffers(current, setting["state"])
+        results.append({
+            "name": setting["name"],
+            "route": setting["route"],
+            "tab": tab,
+            "element": setting["element"],
+            "current": current["value"],
+            "desired": setting["state"],
+            "changed": changed,
+        })
+        if changed and check_mode:
+            LOGGER.info(f"{setting['name']} drifted: {current['value']} (desired {setting['state']})")
+        elif changed:
+            LOGGER.info(f"{setting['name']}: {current['value']} -> {setting['state']}")
+            setElement(driver, current, setting["element"], setting["state"])
+        else:
+            LOGGER.info(f"{setting['name']} is already {current['value']}.")
+
+    if not check_mode and any(result["changed"] for result in results):
+        LOGGER.info("Waiting for save button to be enabled...")
+        WebDriverWait(driver, timeout).until(EC.element_to_be_clickable((By.ID, save)))
+        LOGGER.info("Saving changes...")
+        waitForClick(driver, driver.find_element(By.ID, save))
+        LOGGER.info("Changes saved.")
+    return results
+
+def applySettings(driver, baseUrl, settings, check_mode=False, timeout=10):
+    # Converges all settings in the logged-in browser: one navigation per page, one state
+    # read and at most one save per tab. check_mode only reads, "changed" then marks drift.
+    results = []
+    for route, tabs in groupSettings(settings).items():
+        with traceSpan("applyPage", route=route, check_mode=check_mode):
+            waitForUrl(driver, f"{baseUrl}/#{route}")
+            for (tab, save), tabSettings in tabs.items():
+                results.extend(applyTab(driver, tab, save, tabSettings, check_mode, timeout))
+    return results
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+from urllib.parse import urlparse
+import argparse
+import json
+import logging
+import os
+#
+
+LOGGER = logging.getLogger("selenium")
+
+# Observed per-step latencies, one JSON file per ISE host
+TIMING_STORE = os.getenv("ISE_TIMING_STORE", os.path.expanduser("~/.cache/ise01/timing"))
+TIMING_SAMPLES = 50
+# After this many misses in a row under a cut down budget the next wait uses the full default
+TIMING_PROBE_EVERY = 10
+ADAPTIVE_TIMEOUTS = os.getenv("ISE_ADAPTIVE_TIMEOUTS", "true").lower() == "true"
+
+def getHost(driver):
+    return urlparse(driver.current_url).netloc or "unknown"
+
+def profilePath(host):
+    return os.path.join(TIMING_STORE, host.replace(":", "_").replace("/", "_") + ".json")
+
+def loadProfile(host):
+    try:
+        with open(profilePath(host)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def recordLatency(host, step, seconds, budget=None):
+    # seconds=None records that the awaited element never showed up. budget is the cut down
+    # wait budget when it was below the default, such a miss is censored: it only says that
+    # the element took longer than the budget.
+    profile = loadProfile(host)
+    samples = profile.setdefault(step, [])
+    if seconds is not None:
+        samples.append(round(seconds, 3))
+    elif budget is not None:
+        samples.append({"missed": round(budget, 3)})
+    else:
+        samples.append(None)
+    del samples[:-TIMING_SAMPLES]
+    os.makedirs(TIMING_STORE, exist_ok=True)
+    tmpPath = f"{profilePath(host)}.{os.getpid()}.tmp"
+    with open(tmpPath, "w") as f:
+        json.dump(profile, f, indent=2)
+    os.replace(tmpPath, profilePath(host))
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+def isCensored(sample):
+    return isinstance(sample, dict)
+
+def getWaitBudget(host, step, default, pct=95, margin=1.5, minimum=1.0, min_samples=3, probe_every=TIMING_PROBE_EVERY):
+    # Budget for waiting on an element that may legitimately be missing. It is derived from
+    # how long the element took to appear on this host and never exceeds the default. The p95
+    # of the runs where it did appear is the floor, however many misses followed them, only an
+    # element never seen on this host is waited for no longer than the minimum.
+    # Misses under a cut down budget prove nothing, they are left out, and every probe_every
+    # of them in a row one wait uses the default again to find out whether it is still missing.
+    samples = loadProfile(host).get(step, []) if ADAPTIVE_TIMEOUTS else []
+    uncensored = [sample for sample in samples if not isCensored(sample)]
+    if len(uncensored) < min_samples:
+        return default
+    censoredRun = 0
+    for sample in reversed(samples):
+        if not isCensored(sample):
+            break
+        censoredRun += 1
+    if censoredRun >= probe_every:
+        LOGGER.info(f"Probing {step} on {host} with the default wait budget {default}s after {censoredRun} cut down misses")
+        return default
+    observed = [sample for sample in uncensored if sample is not None]
+    if not observed:
+        budget = minimum
+    else:
+        budget = max(minimum, percentile(observed, pct) * margin)
+    budget = min(default, budget)
+    LOGGER.info(f"Adaptive wait budget for {step} on {host}: {budget:.2f}s (default {default}s)")
+    return budget
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Show recorded ISE step latencies and derived wait budgets")
+    parser.add_argument("--host", type=str, default=os.getenv("ISE_HOST", ""), help="Cisco ISE hostname or IP address (env ISE_HOST) (required)")
+    args = parser.parse_args()
+
+    if not args.host:
+        parser.print_help()
+        exit(1)
+
+    for step, samples in sorted(loadProfile(args.host).items()):
+        observed = [sample for sample in samples if sample is not None and not isCensored(sample)]
+        censored = sum(1 for sample in samples if isCensored(sample))
+        p95 = f"{percentile(observed, 95):.2f}s" if observed else "-"
+        print(f"{step:<20} samples={len(samples):<3} missing={len(samples) - len(observed) - censored:<3} censored={censored:<3} p95={p95}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+from contextlib import contextmanager
+from functools import wraps
+from time import perf_counter, time
+import atexit
+import json
+import os
+import threading
+#
+
+# Span records are appended as JSON lines to ISE_TRACE_FILE, a Chrome trace (chrome://tracing,
+# Perfetto) is written to ISE_CHROME_TRACE_FILE at exit. Without either, spans cost nothing.
+TRACE_FILE = os.getenv("ISE_TRACE_FILE", "")
+CHROME_TRACE_FILE = os.getenv("ISE_CHROME_TRACE_FILE", "")
+
+_local = threading.local()
+_lock = threading.Lock()
+_chromeEvents = []
+_counterInstalled = False
+
+def tracingEnabled():
+    return bool(TRACE_FILE or CHROME_TRACE_FILE)
+
+def activeSpans():
+    if not hasattr(_local, "spans"):
+        _local.spans = []
+    return _local.spans
+
+def installCommandCounter():
+    # Every WebDriver command goes through RemoteConnection.execute, count it for all open spans
+    global _counterInstalled
+    if _counterInstalled:
+        return
+    from selenium.webdriver.remote.remote_connection import RemoteConnection
+    execute = RemoteConnection.execute
+
+    @wraps(execute)
+    def countingExecute(self, command, params):
+        for span in activeSpans():
+            span["commands"] += 1
+        return execute(self, command, params)
+
+    RemoteConnection.execute = countingExecute
+    _counterInstalled = True
+
+def writeChromeTrace():
+    if CHROME_TRACE_FILE and _chromeEvents:
+        with open(CHROME_TRACE_FILE, "w") as f:
+            json.dump({"traceEvents": _chromeEvents, "displayTimeUnit": "ms"}, f)
+
+@contextmanager
+def traceSpan(name, **attributes):
+    if not tracingEnabled():
+        yield
+        return
+    installCommandCounter()
+    spans = activeSpans()
+    span = {"name": name, "commands": 0}
+    parent = spans[-1]["name"] if spans else None
+    spans.append(span)
+    wallStart = time()
+    start = perf_counter()
+    status = "ok"
+    error = None
+    try:
+        yield span
+    except BaseException as e:
+        status = "error"
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        duration = perf_counter() - start
+        spans.pop()
+        record = {
+            "name": name,
+            "ts": wallStart,
+            "duration_ms": round(duration * 1000, 3),
+            "commands": span["commands"],
+            "status": status,
+            "parent": parent,
+            "depth": len(spans),
+            "pid": os.getpid(),
+            "thread": threading.current_thread().name,
+            **attributes,
+        }
+        if error:
+            record["error"] = error
+        with _lock:
+            if TRACE_FILE:
+                with open(TRACE_FILE, "a") as f:
+                    f.write(json.dumps(record) + "\n")
+            if CHROME_TRACE_FILE:
+                _chromeEvents.append({
+                    "name": name,
+                    "ph": "X",
+                    "ts": int(wallStart * 1e6),
+                    "dur": int(duration * 1e6),
+                    "pid": record["pid"],
+                    "tid": threading.get_ident(),
+                    "args": {"commands": span["commands"], "status": status, **attributes},
+                })
+
+def traced(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not tracingEnabled():
+            return func(*args, **kwargs)
+        with traceSpan(func.__name__):
+            return func(*args, **kwargs)
+    return wrapper
+
+atexit.register(writeChromeTrace)
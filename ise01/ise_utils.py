@@ -1,18 +1,31 @@
 #!/usr/bin/env python3
 
 from selenium import webdriver
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
 #
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.wait import WebDriverWait
 #
+from ise_forensics import attachForensics, markStep
+from ise_timing import getHost, getWaitBudget, recordLatency
+from ise_trace import traced
+#
 from datetime import datetime
-from time import sleep
+from time import sleep, time
+import argparse
+import base64
+import ctypes
+import ctypes.util
+import hashlib
+import json
 import logging
+import re
+import select
+import shutil
+import subprocess
 import sys
 import os
 #
@@ -26,31 +39,136 @@ fmt = logging.Formatter(
 stdoutHandler.setFormatter(fmt)
 LOGGER.addHandler(stdoutHandler)
 
+# ChromeDriver binaries resolved once per installed Chrome major version and reused offline
+DRIVER_CACHE = os.getenv("ISE_DRIVER_CACHE", os.path.expanduser("~/.cache/ise01/chromedriver"))
+
+# Authenticated cookies and local storage of finished logins, encrypted with a key derived
+# from the password, one file per host and user. Needs the cryptography package. Opt-in, a
+# cached login is never logged out and keeps its ISE admin session open until it expires.
+LOGIN_CACHE = os.getenv("ISE_LOGIN_CACHE", "false").lower() == "true"
+LOGIN_CACHE_DIR = os.getenv("ISE_LOGIN_CACHE_DIR", os.path.expanduser("~/.cache/ise01/logins"))
+LOGIN_CACHE_MAX_AGE = int(os.getenv("ISE_LOGIN_CACHE_MAX_AGE", "86400"))
+LOGIN_CACHE_KDF_ROUNDS = 200000
+
+# Browser profile: "full" renders everything, "lean" skips images, media and trackers
+BROWSER_PROFILE = os.getenv("ISE_BROWSER_PROFILE", "full")
+LEAN_RENDERER_LIMIT = 1
+LEAN_JS_HEAP_MB = int(os.getenv("ISE_LEAN_JS_HEAP_MB", "512"))
+# Fonts stay allowed, the ISE UI draws its clickable icons (fi-setting, xwtCloseIcon) from icon fonts
+LEAN_BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.bmp", "*.ico",
+    "*.mp4", "*.webm", "*.mp3", "*.wav",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*walkme.com*", "*pendo.io*",
+]
+
+# Readiness probe executed inside the page. It resolves from the browser's own lifecycle
+# events (readystatechange/load, hashchange of the ISE SPA router and resource timing for
+# network idle), so every wait is a single WebDriver round-trip instead of a polling loop.
+PAGE_READY_SCRIPT = """
+var route = arguments[0], idleMs = arguments[1], timeoutMs = arguments[2], readyState = arguments[3];
+var done = arguments[arguments.length - 1];
+var finished = false, idleTimer = null, observer = null;
+function finish(result) {
+    if (finished) { return; }
+    finished = true;
+    clearTimeout(idleTimer);
+    clearTimeout(deadline);
+    if (observer) { observer.disconnect(); }
+    document.removeEventListener("readystatechange", check);
+    window.removeEventListener("hashchange", check);
+    done(result);
+}
+var deadline = setTimeout(function () { finish(false); }, timeoutMs);
+function ready() {
+    var state = document.readyState;
+    return (state === "complete" || state === readyState) && (!route || location.hash.indexOf(route) === 0);
+}
+function armIdle() {
+    clearTimeout(idleTimer);
+    idleTimer = setTimeout(function () { if (ready()) { finish(true); } }, idleMs);
+}
+function check() {
+    if (!ready()) { return; }
+    if (idleMs > 0) { armIdle(); } else { finish(true); }
+}
+if (idleMs > 0 && window.PerformanceObserver) {
+    observer = new PerformanceObserver(function () { if (ready()) { armIdle(); } });
+    observer.observe({type: "resource"});
+}
+document.addEventListener("readystatechange", check);
+window.addEventListener("hashchange", check);
+check();
+"""
+
+def waitForPageEvents(driver, route=None, idle=0, timeout=30):
+    # Blocks in a single async script call until the page fired its load event, the SPA
+    # hash route is active and (if idle > 0) no resource finished loading for idle seconds.
+    # With the eager page load strategy DOMContentLoaded is enough, elements are awaited
+    # explicitly by the callers anyway.
+    # A full navigation started while waiting unloads the document, so re-arm the probe on
+    # the new document until the deadline.
+    readyState = "interactive" if driver.capabilities.get("pageLoadStrategy") == "eager" else "complete"
+    start = datetime.now()
+    while True:
+        remaining = timeout - (datetime.now() - start).total_seconds()
+        if remaining <= 0:
+            return False
+        try:
+            return driver.execute_async_script(PAGE_READY_SCRIPT, route, int(idle * 1000), int(remaining * 1000), readyState)
+        except TimeoutException:
+            return False
+        except WebDriverException as e:
+            if "unloaded" not in str(e) and "navigat" not in str(e):
+                raise
+            LOGGER.info("Document unloaded while waiting, waiting for the new one...")
+
 def waitForReadyState(driver, url=None, clickTarget=None, timeout=30):
     start = datetime.now()
+    route = None
+    idle = 0
     if url:
         LOGGER.info(f"Waiting for {url} page to load...")
         driver.get(url)
+        if "#" in url:
+            # In-app navigation of the ISE SPA only changes the hash route, the view is then
+            # rendered by XHRs, so wait for the route and for the network to settle.
+            route = "#" + url.split("#", 1)[1]
+            idle = 0.25
     elif clickTarget:
         LOGGER.info("Waiting for click to be processed...")
         clickTarget.click()
+        # The click may start a navigation or only XHRs, network idle covers both.
+        idle = 0.25
     else:
         LOGGER.info("Waiting for page to load...")
-    
-    while driver.execute_script("return document.readyState") != "complete":
-        if (datetime.now() - start).seconds > timeout:
-            LOGGER.error(f"Load timed out at {datetime.now()}")
-            raise Exception(f"Load timed out at {datetime.now()}")
-        sleep(0.1)
-    LOGGER.info(f"Loaded in {datetime.now() - start}")      
 
+    if not waitForPageEvents(driver, route=route, idle=idle, timeout=timeout):
+        LOGGER.error(f"Load timed out at {datetime.now()}")
+        raise Exception(f"Load timed out at {datetime.now()}")
+    LOGGER.info(f"Loaded in {datetime.now() - start}")
+    markStep(driver, url or ("click" if clickTarget else "load"))
+
+@traced
 def waitForClick(driver, clickTarget, timeout=30):
     waitForReadyState(driver, clickTarget=clickTarget, timeout=timeout)
 
+@traced
 def waitForUrl(driver, url, timeout=30):
     waitForReadyState(driver, url=url, timeout=timeout)
 
-def getDriver(url=None, download_path=None):
+def getDownloadPath(download_path=None):
+    if not download_path:
+        download_path = os.path.dirname(os.path.abspath(__file__))
+    return download_path
+
+def getBrowserProfile(profile=None):
+    profile = profile or BROWSER_PROFILE
+    if profile not in ("full", "lean"):
+        LOGGER.error(f"Unknown browser profile {profile} at {datetime.now()}")
+        raise Exception(f"Unknown browser profile {profile} at {datetime.now()}")
+    return profile
+
+def getChromeOptions(download_path=None, profile=None):
     chrome_options = Options()
     # chrome_options.add_argument("--headless=new")                  # Run Chrome in headless mode (no visible UI)
     chrome_options.add_argument("--headless")                  # Run Chrome in headless mode (no visible UI)
@@ -60,40 +178,224 @@ def getDriver(url=None, download_path=None):
     chrome_options.add_argument("--ignore-certificate-errors") # Tells Chrome not to reject self-signed certs
     chrome_options.add_argument("--allow-insecure-localhost")  # Allows navigation to pages on localhost with untrusted certs
     chrome_options.page_load_strategy = "normal" # Options are: none, eager, normal
-    if not download_path:
-        download_path = os.path.dirname(os.path.abspath(__file__))
-    chrome_options.add_experimental_option("prefs", {
-        "download.default_directory": download_path,
+    prefs = {
+        "download.default_directory": getDownloadPath(download_path),
         "download.prompt_for_download": False,
-    })
-    # Initialize the ChromeDriver using webdriver_manager
-    LOGGER.info("Starting ChromeDriver...")
-    driver = webdriver.Chrome(
-        service=Service(ChromeDriverManager().install()),
-        options=chrome_options
-    )
-    LOGGER.info("ChromeDriver started.")
+    }
+    if getBrowserProfile(profile) == "lean":
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")                    # Do not decode or paint images
+        chrome_options.add_argument("--disable-extensions")                                    # No extension processes
+        chrome_options.add_argument("--disable-background-networking")                         # No update, safe browsing or metrics requests
+        chrome_options.add_argument("--disable-component-update")                              # No component downloads at startup
+        chrome_options.add_argument("--disable-features=Translate,MediaRouter,OptimizationHints")
+        chrome_options.add_argument("--mute-audio")
+        chrome_options.add_argument(f"--renderer-process-limit={LEAN_RENDERER_LIMIT}")       # One renderer is enough for the single ISE tab
+        chrome_options.add_argument(f"--js-flags=--max-old-space-size={LEAN_JS_HEAP_MB}")    # Cap the V8 heap of each renderer
+        chrome_options.page_load_strategy = "eager" # Return after DOMContentLoaded, elements are awaited explicitly
+        prefs["profile.managed_default_content_settings.images"] = 2
+    chrome_options.add_experimental_option("prefs", prefs)
+    return chrome_options
+
+def getChromeMajorVersion():
+    for binary in ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser"):
+        try:
+            output = subprocess.run([binary, "--version"], capture_output=True, text=True, timeout=10).stdout
+        except (FileNotFoundError, subprocess.TimeoutExpired):
+            continue
+        match = re.search(r"(\d+)\.\d+\.\d+\.\d+", output)
+        if match:
+            return match.group(1)
+    return None
+
+def warmChromeDriverCache(major=None):
+    # Imported lazily, webdriver_manager is only needed on a cache miss
+    from webdriver_manager.chrome import ChromeDriverManager
+    major = major or getChromeMajorVersion()
+    LOGGER.info(f"Resolving ChromeDriver for Chrome {major} with webdriver_manager...")
+    downloaded = ChromeDriverManager().install()
+    if not major:
+        LOGGER.info("Chrome version unknown, not caching ChromeDriver.")
+        return downloaded
+    cached = os.path.join(DRIVER_CACHE, major, "chromedriver")
+    os.makedirs(os.path.dirname(cached), exist_ok=True)
+    shutil.copy2(downloaded, cached + ".tmp")
+    os.chmod(cached + ".tmp", 0o755)
+    os.replace(cached + ".tmp", cached)
+    LOGGER.info(f"ChromeDriver cached at {cached}")
+    return cached
+
+def getChromeDriverPath():
+    major = getChromeMajorVersion()
+    if major:
+        cached = os.path.join(DRIVER_CACHE, major, "chromedriver")
+        if os.access(cached, os.X_OK):
+            LOGGER.info(f"Using cached ChromeDriver {cached}")
+            return cached
+    LOGGER.info("ChromeDriver cache miss.")
+    return warmChromeDriverCache(major)
+
+def setDownloadBehavior(driver, download_path=None):
     LOGGER.info("Setting download behavior...")
     driver.command_executor._commands["send_command"] = ("POST", '/session/$sessionId/chromium/send_command')
     params = {
         'cmd': 'Page.setDownloadBehavior',
         'params': {
             'behavior': 'allow',
-            'downloadPath': download_path
+            'downloadPath': getDownloadPath(download_path)
         }
     }
     driver.execute("send_command", params)
     LOGGER.info("Download behavior set.")
+
+def blockResources(driver, patterns=LEAN_BLOCKED_URLS):
+    # Network.setBlockedURLs fails matching requests inside Chrome, unlike Fetch interception
+    # it needs no event handling round trip for every request.
+    LOGGER.info("Blocking non-essential resources...")
+    driver.command_executor._commands["send_command"] = ("POST", '/session/$sessionId/chromium/send_command')
+    driver.execute("send_command", {'cmd': 'Network.enable', 'params': {}})
+    driver.execute("send_command", {'cmd': 'Network.setBlockedURLs', 'params': {'urls': list(patterns)}})
+    LOGGER.info(f"Blocked {len(patterns)} URL patterns.")
+
+def prepareDriver(driver, download_path=None, profile=None):
+    setDownloadBehavior(driver, download_path)
+    if getBrowserProfile(profile) == "lean":
+        blockResources(driver)
     LOGGER.info("Maximizing window...")
     driver.maximize_window()
     driver.set_window_size(1920, 1080)
     LOGGER.info("Window maximized.")
+    # Readiness waits enforce their own deadlines in-page, the driver limit is only a backstop
+    driver.set_script_timeout(600)
+
+@traced
+def getDriver(url=None, download_path=None, profile=None):
+    # profile "lean" trades images and background work for faster loads and lower RSS
+    chrome_options = getChromeOptions(download_path, profile)
+    # Initialize the ChromeDriver from the local cache (webdriver_manager only on a cache miss)
+    LOGGER.info("Starting ChromeDriver...")
+    driver = webdriver.Chrome(
+        service=Service(getChromeDriverPath()),
+        options=chrome_options
+    )
+    LOGGER.info("ChromeDriver started.")
+    prepareDriver(driver, download_path, profile)
+    attachForensics(driver)
     if url:
         waitForUrl(driver, url)
     LOGGER.info("Returning driver.")
     return driver
 
+# Cheap authenticated request, ISE redirects unauthenticated requests to login.jsp
+SESSION_CHECK_SCRIPT = """
+var done = arguments[arguments.length - 1];
+fetch("/admin/", {credentials: "same-origin", redirect: "manual", cache: "no-store"})
+    .then(function (response) { done(response.type !== "opaqueredirect" && response.ok); })
+    .catch(function () { done(false); });
+"""
+
+def iseSessionAlive(driver, timeout=10):
+    try:
+        driver.set_script_timeout(timeout)
+        return bool(driver.execute_async_script(SESSION_CHECK_SCRIPT))
+    except WebDriverException:
+        return False
+    finally:
+        driver.set_script_timeout(600)
+
+def loginCachePath(host, username):
+    key = hashlib.sha256(f"{username}@{host}".encode()).hexdigest()[:32]
+    return os.path.join(LOGIN_CACHE_DIR, f"{key}.json")
+
+def getLoginCipher(password, salt):
+    try:
+        from cryptography.fernet import Fernet
+    except ImportError:
+        LOGGER.info("cryptography is not installed, login cache disabled.")
+        return None
+    key = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, LOGIN_CACHE_KDF_ROUNDS)
+    return Fernet(base64.urlsafe_b64encode(key))
+
+def saveLoginCache(driver, username, password):
+    host = getHost(driver)
+    salt = os.urandom(16)
+    cipher = getLoginCipher(password, salt)
+    if cipher is None:
+        return False
+    state = {
+        "cookies": driver.get_cookies(),
+        "local_storage": driver.execute_script("return Object.assign({}, window.localStorage);"),
+    }
+    entry = {
+        "saved": time(),
+        "salt": base64.b64encode(salt).decode(),
+        "token": cipher.encrypt(json.dumps(state).encode()).decode(),
+    }
+    os.makedirs(LOGIN_CACHE_DIR, mode=0o700, exist_ok=True)
+    path = loginCachePath(host, username)
+    tmpPath = f"{path}.{os.getpid()}.tmp"
+    with open(os.open(tmpPath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as f:
+        json.dump(entry, f)
+    os.replace(tmpPath, path)
+    driver.iseLoginCached = True
+    LOGGER.info(f"Saved ISE login of {username} at {host} to the login cache.")
+    return True
+
+def dropLoginCache(host, username):
+    try:
+        os.remove(loginCachePath(host, username))
+    except FileNotFoundError:
+        pass
+
+def restoreLoginCache(driver, username, password, timeout=30):
+    # Restores a cached login into the browser, which has to be on an ISE page already
+    # (cookies can only be set for the current origin). The session is checked with one
+    # authenticated request, expired or undecryptable entries are dropped.
+    host = getHost(driver)
+    try:
+        with open(loginCachePath(host, username)) as f:
+            entry = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return False
+    if time() - entry.get("saved", 0) > LOGIN_CACHE_MAX_AGE:
+        LOGGER.info("Cached ISE login is too old, logging in again.")
+        dropLoginCache(host, username)
+        return False
+    cipher = getLoginCipher(password, base64.b64decode(entry["salt"]))
+    if cipher is None:
+        return False
+    try:
+        from cryptography.fernet import InvalidToken
+        state = json.loads(cipher.decrypt(entry["token"].encode()))
+    except (InvalidToken, ValueError):
+        # Different password (e.g. after a reset) or a corrupted file
+        LOGGER.info("Cached ISE login cannot be decrypted, logging in again.")
+        return False
+
+    LOGGER.info("Restoring cached ISE login...")
+    for cookie in state["cookies"]:
+        cookie.pop("domain", None)
+        try:
+            driver.add_cookie(cookie)
+        except WebDriverException:
+            LOGGER.info(f"Cookie {cookie.get('name')} could not be restored.")
+    driver.execute_script(
+        "var items = arguments[0]; for (var key in items) { window.localStorage.setItem(key, items[key]); }",
+        state["local_storage"]
+    )
+    if not iseSessionAlive(driver):
+        LOGGER.info("Cached ISE login has expired, logging in again.")
+        driver.delete_all_cookies()
+        driver.execute_script("window.localStorage.clear();")
+        dropLoginCache(host, username)
+        return False
+    waitForUrl(driver, f"https://{host}/admin/", timeout=timeout)
+    driver.iseLoginCached = True
+    LOGGER.info("Cached ISE login restored.")
+    return True
+
+@traced
 def iseLogin(driver, username=None, password=None, check_mode=False, timeout=30):
+    start = datetime.now()
     try:
         LOGGER.info("Waiting for ISE login page to load...")
         loginPageReady = WebDriverWait(driver, timeout).until(
@@ -107,6 +409,7 @@ def iseLogin(driver, username=None, password=None, check_mode=False, timeout=30)
             )
         )
         LOGGER.info("ISE login page loaded.")
+        recordLatency(getHost(driver), "login-page", (datetime.now() - start).total_seconds())
     except (TimeoutException, NoSuchElementException) as e:
         loginPageReady = False
 
@@ -122,6 +425,9 @@ def iseLogin(driver, username=None, password=None, check_mode=False, timeout=30)
         LOGGER.error("Username and password are required to login to ISE at %s", datetime.now())
         raise Exception(f"Username and password are required to login to ISE at {datetime.now()}")
 
+    if LOGIN_CACHE and restoreLoginCache(driver, username, password, timeout=timeout):
+        return
+
     LOGGER.info("Entering username...")
     username_field = driver.find_element(By.NAME, "username")
     username_field.click()
@@ -134,91 +440,129 @@ def iseLogin(driver, username=None, password=None, check_mode=False, timeout=30)
     LOGGER.info("Password entered.")
     LOGGER.info("Submitting login form...")
     submit_button = driver.find_element(By.ID, "loginPage_loginSubmit")
+    start = datetime.now()
     waitForClick(driver, submit_button)
+    recordLatency(getHost(driver), "login-submit", (datetime.now() - start).total_seconds())
     LOGGER.info("Login form submitted.")
+    # Only a completed login is worth caching, not the enforced password reset page
+    if LOGIN_CACHE and "/admin" in driver.current_url and "login.jsp" not in driver.current_url and "resetPassword" not in driver.current_url:
+        saveLoginCache(driver, username, password)
+
+# Post-login pop-up resolver executed inside the page. A single probe reports every pop-up
+# type (xwtAlert button, ise-modal carousel, xwtCloseIcon); the resolver dismisses whatever
+# it finds and waits on DOM mutations for the next one, so the whole sequence costs one
+# WebDriver round-trip instead of stacked WebDriverWaits. A click only counts as a dismissed
+# pop-up when its element goes away, an element that stays (a close icon of a regular panel)
+# is left alone from then on.
+POPUP_RESOLVER_SCRIPT = """
+var firstMs = arguments[0], nextMs = arguments[1], dismissMs = arguments[2], timeoutMs = arguments[3];
+var done = arguments[arguments.length - 1];
+var started = Date.now();
+var result = {actions: [], ignored: [], first: null, next: [], dismiss: [], timedOut: false};
+var stuck = [], waits = 0;
+function visible(element) {
+    return !!(element && (element.offsetWidth || element.offsetHeight || element.getClientRects().length));
+}
+function usable(element) {
+    return visible(element) && stuck.indexOf(element) < 0;
+}
+function firstUsable(selector) {
+    var elements = document.querySelectorAll(selector);
+    for (var i = 0; i < elements.length; i++) { if (usable(elements[i])) { return elements[i]; } }
+    return null;
+}
+function probe() {
+    var alertButton = firstUsable("div.xwtAlert button");
+    if (alertButton) { return {type: "alert", target: alertButton}; }
+    var nextButton = document.getElementById("carousel-next");
+    if (document.getElementById("ise-modal") && usable(nextButton)) { return {type: "modal", target: nextButton}; }
+    var closeIcon = firstUsable(".xwtCloseIcon");
+    if (closeIcon) { return {type: "close", target: closeIcon}; }
+    return null;
+}
+function waitFor(ms, condition, callback) {
+    var mutated = false;
+    if (condition(mutated)) { callback(true); return; }
+    var timer = null;
+    var observer = new MutationObserver(function () {
+        mutated = true;
+        if (condition(mutated)) { cleanup(); callback(true); }
+    });
+    function cleanup() { observer.disconnect(); clearTimeout(timer); }
+    observer.observe(document.documentElement, {childList: true, subtree: true, attributes: true});
+    timer = setTimeout(function () { cleanup(); callback(condition(mutated)); }, ms);
+}
+function resolve(waitMs) {
+    if (Date.now() - started > timeoutMs || result.actions.length + result.ignored.length >= 50) {
+        result.timedOut = true;
+        done(result);
+        return;
+    }
+    var waitStart = Date.now();
+    waitFor(waitMs, function () { return probe() !== null; }, function (found) {
+        var elapsed = (Date.now() - waitStart) / 1000;
+        if (waits++ === 0) { result.first = found ? elapsed : null; } else { result.next.push(found ? elapsed : null); }
+        if (!found) { done(result); return; }
+        var popUp = probe();
+        var clickStart = Date.now();
+        var modal = document.getElementById("ise-modal");
+        var slide = popUp.type === "modal" ? modal.innerHTML : null;
+        popUp.target.click();
+        // The carousel reuses its next button, a changed modal means the slide moved on. A click
+        // handler may remove the pop-up before the observer is attached, gone counts without mutations.
+        waitFor(dismissMs, function (mutated) {
+            if (!document.contains(popUp.target) || !visible(popUp.target)) { return true; }
+            return popUp.type === "modal" && (mutated || !document.contains(modal) || modal.innerHTML !== slide);
+        }, function (dismissed) {
+            result.dismiss.push(dismissed ? (Date.now() - clickStart) / 1000 : null);
+            if (dismissed) { result.actions.push(popUp.type); } else { stuck.push(popUp.target); result.ignored.push(popUp.type); }
+            resolve(nextMs);
+        });
+    });
+}
+resolve(firstMs);
+"""
 
+@traced
 def isePostLoginPopUps(driver, timeout=30):
-    # while class:xwtAlert is present
-    while True:
-        try:
-            LOGGER.info("Waiting for ISE alert pop-up to appear...")
-            WebDriverWait(driver, timeout).until(
-                EC.presence_of_element_located((By.CLASS_NAME, "xwtAlert"))
-            )
-            LOGGER.info("ISE alert pop-up found.")
-            # find button element within above class div using xpath and click it
-            try:
-                LOGGER.info("Waiting for alert button to appear and to be clickable...")
-                WebDriverWait(driver, timeout).until(
-                    EC.all_of(
-                        EC.presence_of_element_located((By.XPATH, "//div[contains(@class,'xwtAlert')]//button")),
-                        EC.element_to_be_clickable((By.XPATH, "//div[contains(@class,'xwtAlert')]//button"))
-                    )
-                )
-                LOGGER.info("Alert button found and clickable.")
-                alertButton = driver.find_element(By.XPATH, "//div[contains(@class,'xwtAlert')]//button")
-                LOGGER.info("Clicking alert button...")
-                alertButton.click()
-                LOGGER.info("Alert button clicked.")
-                timeout = 5
-                LOGGER.info("Waiting for ISE UI to reflect changes...")
-                sleep(1)
-                LOGGER.info("Waiting finished.")
-            except (TimeoutException, NoSuchElementException) as e:
-                LOGGER.error("Failed to find alert button in ISE pop-up at %s", datetime.now())
-                raise Exception(f"Failed to find alert button in ISE pop-up at {datetime.now()}")
-        except (TimeoutException, NoSuchElementException) as e:
-            LOGGER.info("ISE alert pop-up not found.")
-            break                  
-    timeout = 5
-    # while id:ise-modal is present
+    host = getHost(driver)
+    first = getWaitBudget(host, "popup-first", timeout)
+    following = getWaitBudget(host, "popup-next", 5)
+    dismiss = getWaitBudget(host, "popup-dismiss", 1, minimum=0.2)
+    LOGGER.info("Resolving ISE post-login pop-ups...")
+    start = datetime.now()
     while True:
         try:
-            LOGGER.info("Waiting for ISE modal to appear...")
-            WebDriverWait(driver, timeout).until(
-                EC.presence_of_element_located((By.ID, "ise-modal"))
+            result = driver.execute_async_script(
+                POPUP_RESOLVER_SCRIPT, int(first * 1000), int(following * 1000), int(dismiss * 1000), int((first + 60) * 1000)
             )
-            LOGGER.info("ISE modal found.")
-            # find id:carousel-next button and click it
-            try:
-                LOGGER.info("Waiting for next button to appear and to be clickable...")
-                WebDriverWait(driver, timeout).until(
-                    EC.all_of(
-                        EC.presence_of_element_located((By.ID, "carousel-next")),
-                        EC.element_to_be_clickable((By.ID, "carousel-next"))
-                    )
-                )
-                LOGGER.info("Next button found and clickable.")
-                nextButton = driver.find_element(By.ID, "carousel-next")
-                LOGGER.info("Clicking next button...")
-                nextButton.click()
-                LOGGER.info("Next button clicked.")
-                LOGGER.info("Waiting for ISE UI to reflect changes...")
-                sleep(1)
-                LOGGER.info("Waiting finished.")
-            except (TimeoutException, NoSuchElementException) as e:
-                LOGGER.error("Failed to find next button in ISE modal at %s", datetime.now())
-                raise Exception(f"Failed to find next button in ISE modal at {datetime.now()}")
-        except (TimeoutException, NoSuchElementException) as e:
-            LOGGER.info("ISE modal not found.")
             break
-    # if class:xwtCloseIcon is present
-    try:
-        WebDriverWait(driver, timeout).until(
-            EC.visibility_of_element_located((By.CLASS_NAME, "xwtCloseIcon"))
-        )
-        LOGGER.info("Close icon found visible.")
-        closeIcon = driver.find_element(By.CLASS_NAME, "xwtCloseIcon")
-        LOGGER.info("Clicking close icon...")
-        closeIcon.click()
-        LOGGER.info("Close icon clicked.")
-        WebDriverWait(driver, timeout).until(
-            EC.invisibility_of_element_located((By.CLASS_NAME, "xwtCloseIcon"))
-        )
-    except (TimeoutException, NoSuchElementException) as e:
-        LOGGER.info("No alert close icon found visible.")
+        except WebDriverException as e:
+            if "unloaded" not in str(e) or (datetime.now() - start).total_seconds() > first + 60:
+                raise
+            LOGGER.info("Document unloaded while resolving pop-ups, resolving on the new one...")
+    recordLatency(host, "popup-first", result["first"], first if first < timeout else None)
+    for seconds in result["next"]:
+        recordLatency(host, "popup-next", seconds, following if following < 5 else None)
+    for seconds in result["dismiss"]:
+        recordLatency(host, "popup-dismiss", seconds, dismiss if dismiss < 1 else None)
+    if result["timedOut"]:
+        LOGGER.error("ISE pop-ups kept appearing after %s dismissed at %s", result["actions"], datetime.now())
+        raise Exception(f"ISE pop-ups kept appearing after {result['actions']} dismissed at {datetime.now()}")
+    if result["ignored"]:
+        LOGGER.info(f"ISE pop-up elements {result['ignored']} stayed after a click, left them alone.")
+    if result["actions"]:
+        LOGGER.info(f"Dismissed ISE pop-ups {result['actions']} in {datetime.now() - start}")
+    else:
+        LOGGER.info("No ISE pop-ups found.")
 
-def iseLogout(driver, timeout=30):
+@traced
+def iseLogout(driver, timeout=30, force=False):
+    if getattr(driver, "iseLoginCached", False) and not force:
+        # Logging out would invalidate the cached cookies for the next run, only reached with
+        # ISE_LOGIN_CACHE=true
+        LOGGER.info("Keeping cached ISE login, skipping logout.")
+        return
     try:
         LOGGER.info("Waiting for settings dropdown to appear...")
         settingsDropdown = WebDriverWait(driver, timeout).until(
@@ -253,8 +597,110 @@ def iseLogout(driver, timeout=30):
     waitForClick(driver, logoutLink)
     LOGGER.info("Logout successful.")
 
+class DownloadWatcher:
+    # Waits for a browser download to finish. Chrome writes into "<name>.crdownload" and
+    # renames it to <name> once complete, so on Linux the rename (or the close of a file
+    # written in place) is picked up from inotify the moment it happens. Elsewhere the
+    # target path is checked every 100 ms. The download counts as complete once no partial
+    # download of this run is left and the file has the same non-zero size on two checks
+    # STABLE_INTERVAL apart.
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    STABLE_INTERVAL = 0.5
+
+    def __init__(self, download_path, filename):
+        self.download_path = getDownloadPath(download_path)
+        self.filename = filename
+        self.fd = None
+        self.started = time()
+        self.lastSize = None
+
+    def __enter__(self):
+        # Armed before the download is triggered so no completion event can be missed
+        libcName = ctypes.util.find_library("c")
+        libc = ctypes.CDLL(libcName, use_errno=True) if libcName else None
+        if libc is not None and hasattr(libc, "inotify_init1"):
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd >= 0 and libc.inotify_add_watch(fd, self.download_path.encode(), self.IN_CLOSE_WRITE | self.IN_MOVED_TO) >= 0:
+                self.fd = fd
+            elif fd >= 0:
+                os.close(fd)
+        if self.fd is None:
+            LOGGER.info("inotify not available, checking for the download periodically.")
+        return self
+
+    def __exit__(self, *exc):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def partialDownloads(self):
+        # Chrome names partial files "<name>.crdownload" or "Unconfirmed <n>.crdownload",
+        # leftovers of earlier runs are older than the watcher
+        partial = []
+        for name in os.listdir(self.download_path):
+            path = os.path.join(self.download_path, name)
+            try:
+                if name.endswith(".crdownload") and (name == self.filename + ".crdownload" or os.path.getmtime(path) >= self.started - 1):
+                    partial.append(name)
+            except FileNotFoundError:
+                pass
+        return partial
+
+    def completed(self):
+        path = os.path.join(self.download_path, self.filename)
+        try:
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            size = None
+        if size is None or self.partialDownloads():
+            self.lastSize = None
+            return False
+        stable = size > 0 and size == self.lastSize
+        self.lastSize = size
+        return stable
+
+    def wait(self, timeout=900):
+        start = datetime.now()
+        LOGGER.info(f"Waiting for {self.filename} download to complete...")
+        while not self.completed():
+            remaining = timeout - (datetime.now() - start).total_seconds()
+            if remaining <= 0:
+                LOGGER.error(f"Download of {self.filename} timed out at {datetime.now()}")
+                return False
+            # The file is in place, check its size again after the interval
+            interval = self.STABLE_INTERVAL if self.lastSize is not None else None
+            if self.fd is None:
+                sleep(min(interval or 0.1, remaining))
+                continue
+            if not select.select([self.fd], [], [], min(interval or remaining, remaining))[0]:
+                continue
+            # Drain the events, completed() decides whether the awaited file is in place
+            try:
+                os.read(self.fd, 65536)
+            except BlockingIOError:
+                pass
+        LOGGER.info(f"Downloaded {self.filename} in {datetime.now() - start}")
+        return True
+
 def takeScreenshot(driver, prefix= "", suffix="", folder=""):
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")
     if not folder:
         folder = "./"
     driver.save_screenshot(folder + prefix + timestamp + suffix + ".png")
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="ISE Selenium helpers")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.add_parser("warm-driver-cache", help=f"Resolve ChromeDriver for the installed Chrome into {DRIVER_CACHE}")
+    args = parser.parse_args(argv)
+
+    if args.command == "warm-driver-cache":
+        print(getChromeDriverPath())
+    else:
+        parser.print_help()
+        exit(1)
+
+if __name__ == "__main__":
+    main()
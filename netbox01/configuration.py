@@ -10,6 +10,10 @@
 # Example: ALLOWED_HOSTS = ['netbox.example.com', 'netbox.internal.local']
 ALLOWED_HOSTS = [$ALLOWED_HOSTS]
 
+# Connect through the local PgBouncer in transaction pooling mode (see netbox01/pgbouncer/pgbouncer.ini) instead of
+# directly to PostgreSQL. Server-side cursors do not survive transaction pooling and must be disabled with it.
+DATABASE_PGBOUNCER = '$NETBOX_DB_PGBOUNCER' == 'true'
+
 # PostgreSQL database configuration. See the Django documentation for a complete list of available parameters:
 #   https://docs.djangoproject.com/en/stable/ref/settings/#databases
 DATABASE = {
@@ -18,13 +22,18 @@ DATABASE = {
     'USER': '$NETBOX_DB_USERNAME',               # PostgreSQL username
     'PASSWORD': '$NETBOX_DB_PASSWORD',           # PostgreSQL password
     'HOST': 'localhost',      # Database server
-    'PORT': '',               # Database port (leave blank for default)
+    'PORT': '6432' if DATABASE_PGBOUNCER else '',  # Database port (leave blank for default)
     'CONN_MAX_AGE': 300,      # Max database connection age
+    'DISABLE_SERVER_SIDE_CURSORS': DATABASE_PGBOUNCER,
 }
 
 # Redis database settings. Redis is used for caching and for queuing background tasks such as webhook events. A separate
 # configuration exists for each. Full connection details are required in both sections, and it is strongly recommended
 # to use two separate database IDs.
+#
+# Caching runs on its own Redis instance (redis-server@cache, see netbox01/redis/redis-cache.conf) on port 6380. It is
+# memory-only with LRU eviction, so cache churn never competes with the persisted task queues on port 6379. Cache entry
+# lifetime is bounded there (maxmemory + allkeys-lru), NetBox 4 has no CACHE_TIMEOUT setting anymore.
 REDIS = {
     'tasks': {
         'HOST': 'localhost',
@@ -44,13 +53,13 @@ REDIS = {
     },
     'caching': {
         'HOST': 'localhost',
-        'PORT': 6379,
+        'PORT': 6380,
         # Comment out `HOST` and `PORT` lines and uncomment the following if using Redis Sentinel
         # 'SENTINELS': [('mysentinel.redis.example.com', 6379)],
         # 'SENTINEL_SERVICE': 'netbox',
         'USERNAME': '',
         'PASSWORD': '',
-        'DATABASE': 1,
+        'DATABASE': 0,
         'SSL': False,
         # Set this to True to skip TLS certificate verification
         # This can expose the connection to attacks, be careful
@@ -175,7 +184,7 @@ LOGOUT_REDIRECT_URL = 'home'
 # MEDIA_ROOT = '/opt/netbox/netbox/media'
 
 # Expose Prometheus monitoring metrics at the HTTP endpoint '/metrics'
-METRICS_ENABLED = False
+METRICS_ENABLED = True
 
 # Enable installed plugins. Add the name of each plugin to the list.
 PLUGINS = [
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from statistics import median
+from time import perf_counter
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+import argparse
+import http.client
+import json
+import logging
+import os
+import shlex
+import socket
+import ssl
+import subprocess
+import sys
+import threading
+#
+
+LOGGER = logging.getLogger("netbox")
+LOGGER.setLevel(logging.INFO)
+LOGGER.addHandler(logging.StreamHandler(stream=sys.stdout))
+
+# Inventory and secrets plugin views are the slow ones under concurrent use
+ENDPOINTS = [
+    "/api/status/",
+    "/api/dcim/devices/?limit=100",
+    "/api/dcim/sites/?limit=100",
+    "/api/plugins/inventory/assets/?limit=100",
+    "/api/plugins/inventory/suppliers/?limit=100",
+    "/api/plugins/secrets/secrets/?limit=100",
+]
+
+def redisInfo(host, port, timeout=5):
+    # INFO over a plain socket (RESP inline command), no redis client needed
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        sock.sendall(b"INFO stats\r\n")
+        data = b""
+        while b"\r\n" not in data:
+            data += sock.recv(4096)
+        header, data = data.split(b"\r\n", 1)
+        if not header.startswith(b"$"):
+            raise Exception(f"Unexpected Redis reply {header!r} at {datetime.now()}")
+        length = int(header[1:])
+        while len(data) < length:
+            data += sock.recv(4096)
+    info = {}
+    for line in data[:length].decode().splitlines():
+        if ":" in line and not line.startswith("#"):
+            key, value = line.split(":", 1)
+            info[key] = value
+    return info
+
+def cacheCounters(host, port):
+    try:
+        info = redisInfo(host, port)
+    except OSError as e:
+        LOGGER.info(f"Redis cache at {host}:{port} not reachable ({e}), skipping hit ratio.")
+        return None
+    return {"hits": int(info.get("keyspace_hits", 0)), "misses": int(info.get("keyspace_misses", 0))}
+
+# Backend connections to the netbox database as PostgreSQL sees them, PgBouncer's own pool included
+PG_CONNECTIONS_QUERY = "SELECT count(*) FROM pg_stat_activity WHERE datname = 'netbox' AND backend_type = 'client backend'"
+
+class ConnectionSampler(threading.Thread):
+    # Counts PostgreSQL backend connections every interval while the load runs
+    def __init__(self, psql, interval=0.5):
+        super().__init__(daemon=True)
+        self.command = shlex.split(psql) + ["-Atc", PG_CONNECTIONS_QUERY]
+        self.interval = interval
+        self.samples = []
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            try:
+                output = subprocess.run(self.command, capture_output=True, text=True, timeout=10).stdout.strip()
+                self.samples.append(int(output))
+            except (OSError, ValueError, subprocess.TimeoutExpired) as e:
+                LOGGER.info(f"PostgreSQL connection sampling failed ({e}), stopping it.")
+                return
+            self.stopped.wait(self.interval)
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        if not self.samples:
+            return None
+        return {"samples": len(self.samples), "max": max(self.samples), "mean": round(sum(self.samples) / len(self.samples), 1)}
+
+def timeRequest(url, token, context, timeout):
+    request = Request(url, headers={"Authorization": f"Token {token}", "Accept": "application/json"})
+    start = perf_counter()
+    try:
+        with urlopen(request, context=context, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except HTTPError as e:
+        status = e.code
+    except (OSError, http.client.HTTPException):
+        # Refused, reset, timed out or a broken response, a failed sample like any non-200
+        status = None
+    return perf_counter() - start, status
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+def runLoad(base_url, token, endpoints, requests, concurrency, timeout=30, verify=False):
+    context = ssl.create_default_context()
+    if not verify:
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    jobs = [endpoint for endpoint in endpoints for _ in range(requests)]
+    start = perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        timings = list(pool.map(lambda endpoint: (endpoint, *timeRequest(base_url + endpoint, token, context, timeout)), jobs))
+    elapsed = perf_counter() - start
+    results = {}
+    for endpoint in endpoints:
+        samples = [seconds for name, seconds, status in timings if name == endpoint and status == 200]
+        errors = sum(1 for name, seconds, status in timings if name == endpoint and status != 200)
+        results[endpoint] = {
+            "requests": requests,
+            "errors": errors,
+            "p50_ms": round(median(samples) * 1000, 1) if samples else None,
+            "p95_ms": round(percentile(samples, 95) * 1000, 1) if samples else None,
+        }
+    return {"seconds": round(elapsed, 3), "rps": round(len(jobs) / elapsed, 1), "endpoints": results}
+
+def hitRatio(before, after):
+    if not before or not after:
+        return None
+    hits = after["hits"] - before["hits"]
+    misses = after["misses"] - before["misses"]
+    return round(hits / (hits + misses), 3) if hits + misses else None
+
+def compareReports(before, after):
+    print(f"{'':<45} {'before':>10} {'after':>10}")
+    print(f"{'requests/s':<45} {before['load']['rps']:>10} {after['load']['rps']:>10}")
+    print(f"{'cache hit ratio':<45} {str(before['cache_hit_ratio']):>10} {str(after['cache_hit_ratio']):>10}")
+    for key in ("max", "mean"):
+        old = (before.get("pg_connections") or {}).get(key)
+        new = (after.get("pg_connections") or {}).get(key)
+        print(f"{'postgres connections ' + key:<45} {str(old):>10} {str(new):>10}")
+    for endpoint, values in after["load"]["endpoints"].items():
+        old = before["load"]["endpoints"].get(endpoint, {})
+        print(f"{endpoint + ' p95 ms':<45} {str(old.get('p95_ms')):>10} {str(values['p95_ms']):>10}")
+
+def main():
+
+    # process arguments, failover to environment variables
+    parser = argparse.ArgumentParser(description="Measure NetBox API latency, Redis cache hit ratio and PostgreSQL connections under concurrent load")
+    parser.add_argument("--url", type=str, default=os.getenv("NETBOX_URL", "https://localhost"), help="NetBox base URL (env NETBOX_URL)")
+    parser.add_argument("--token", type=str, default=os.getenv("NETBOX_TOKEN", ""), help="NetBox API token (env NETBOX_TOKEN) (required)")
+    parser.add_argument("--endpoints", type=str, default=",".join(ENDPOINTS), help="Comma separated API paths to request")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed requests per endpoint before measuring")
+    parser.add_argument("--redis-host", type=str, default=os.getenv("NETBOX_CACHE_REDIS_HOST", "localhost"), help="Redis cache host (env NETBOX_CACHE_REDIS_HOST)")
+    parser.add_argument("--redis-port", type=int, default=int(os.getenv("NETBOX_CACHE_REDIS_PORT", "6380")), help="Redis cache port (env NETBOX_CACHE_REDIS_PORT)")
+    parser.add_argument("--psql", type=str, default=os.getenv("NETBOX_LOAD_PSQL", ""), help="psql command used to sample PostgreSQL connections during the run, e.g. 'sudo -u postgres psql' (env NETBOX_LOAD_PSQL)")
+    parser.add_argument("--verify", action="store_true", help="Verify the NetBox TLS certificate")
+    parser.add_argument("--label", type=str, default="", help="Name of this run, e.g. before or after")
+    parser.add_argument("--report", type=str, default="", help="Write the results as JSON to this file")
+    parser.add_argument("--compare", type=str, default="", help="Earlier report to compare this run against")
+    args = parser.parse_args()
+    endpoints = [endpoint.strip() for endpoint in args.endpoints.split(",") if endpoint.strip()]
+
+    if not args.token or not endpoints:
+        parser.print_help()
+        exit(1)
+
+    base_url = args.url.rstrip("/")
+    if args.warmup:
+        LOGGER.info("Warming up...")
+        runLoad(base_url, args.token, endpoints, args.warmup, args.concurrency, verify=args.verify)
+    before = cacheCounters(args.redis_host, args.redis_port)
+    LOGGER.info(f"Sending {args.requests} requests to each of {len(endpoints)} endpoints with {args.concurrency} clients...")
+    started = datetime.now()
+    sampler = ConnectionSampler(args.psql) if args.psql else None
+    if sampler:
+        sampler.start()
+    load = runLoad(base_url, args.token, endpoints, args.requests, args.concurrency, verify=args.verify)
+    after = cacheCounters(args.redis_host, args.redis_port)
+    pg_connections = sampler.stop() if sampler else None
+    report = {
+        "label": args.label,
+        "url": base_url,
+        "started": started.isoformat(),
+        "concurrency": args.concurrency,
+        "cache_hit_ratio": hitRatio(before, after),
+        "pg_connections": pg_connections,
+        "load": load,
+    }
+
+    for endpoint, values in load["endpoints"].items():
+        LOGGER.info(f"{endpoint:<45} p50 {str(values['p50_ms']):>8} ms p95 {str(values['p95_ms']):>8} ms errors {values['errors']}")
+    LOGGER.info(f"{load['rps']} requests/s, cache hit ratio {report['cache_hit_ratio']}")
+    if pg_connections:
+        LOGGER.info(f"PostgreSQL connections: max {pg_connections['max']}, mean {pg_connections['mean']}")
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compareReports(json.load(f), report)
+    exit(0 if all(values["errors"] == 0 for values in load["endpoints"].values()) else 1)
+
+if __name__ == "__main__":
+    main()
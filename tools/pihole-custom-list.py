@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+import argparse
+import hashlib
+import ipaddress
+import logging
+import os
+import re
+import subprocess
+import sys
+#
+
+LOGGER = logging.getLogger("pihole-custom-list")
+LOGGER.setLevel(logging.INFO)
+LOGGER.addHandler(logging.StreamHandler(stream=sys.stderr))
+
+CUSTOM_LIST = "/etc/pihole/custom.list"
+HOSTNAME = re.compile(r"^(?=.{1,253}$)([A-Za-z0-9_]([A-Za-z0-9_-]{0,61}[A-Za-z0-9])?)(\.[A-Za-z0-9_]([A-Za-z0-9_-]{0,61}[A-Za-z0-9])?)*\.?$")
+# SIGHUP to pihole-FTL: re-reads custom.list without restarting the resolver
+RELOAD_COMMAND = ["pihole", "restartdns", "reload"]
+
+def parseTsv(path):
+    # "<ip>\t<hostname>[\t<hostname>...]" per line, "#" starts a comment. Returns the
+    # (ip, hostname) records in file order and every problem found, with line numbers.
+    records = []
+    errors = []
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            fields = line.split()
+            if len(fields) < 2:
+                errors.append(f"{path}:{number}: expected an IP address and at least one hostname")
+                continue
+            try:
+                ip = str(ipaddress.ip_address(fields[0]))
+            except ValueError:
+                errors.append(f"{path}:{number}: {fields[0]!r} is not a valid IP address")
+                continue
+            for hostname in fields[1:]:
+                if not HOSTNAME.match(hostname):
+                    errors.append(f"{path}:{number}: {hostname!r} is not a valid hostname")
+                    continue
+                records.append((ip, hostname.rstrip(".").lower(), number))
+    return records, errors
+
+def compileRecords(path, records):
+    # Drops exact duplicates. A name may point to several addresses, pihole-FTL answers
+    # with all of them like multiple A/AAAA records.
+    seen = {}
+    compiled = []
+    for ip, hostname, number in records:
+        if (ip, hostname) in seen:
+            LOGGER.info(f"{path}:{number}: duplicate of line {seen[(ip, hostname)]}, dropped")
+            continue
+        seen[(ip, hostname)] = number
+        compiled.append((ip, hostname))
+    return compiled
+
+def renderCustomList(compiled):
+    return "".join(f"{ip} {hostname}\n" for ip, hostname in compiled)
+
+def contentHash(content):
+    return hashlib.sha256(content.encode()).hexdigest()
+
+def compileTsv(path):
+    records, errors = parseTsv(path)
+    if errors:
+        raise Exception("\n".join(errors))
+    return renderCustomList(compileRecords(path, records))
+
+def applyCustomList(content, target=CUSTOM_LIST, reload_command=RELOAD_COMMAND):
+    # Returns True when the list changed. The new file is written next to the target and
+    # renamed over it, so pihole-FTL never reads a half written list.
+    try:
+        with open(target) as f:
+            current = f.read()
+    except FileNotFoundError:
+        current = None
+    if current is not None and contentHash(current) == contentHash(content):
+        LOGGER.info(f"{target} is up to date ({contentHash(content)[:12]}), nothing to do.")
+        return False
+
+    tmpPath = f"{target}.{os.getpid()}.tmp"
+    with open(tmpPath, "w") as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.chmod(tmpPath, 0o644)
+    os.replace(tmpPath, target)
+    LOGGER.info(f"{target} updated to {contentHash(content)[:12]} ({len(content.splitlines())} records).")
+    if reload_command:
+        LOGGER.info(f"Reloading with {' '.join(reload_command)}...")
+        subprocess.run(reload_command, check=True)
+    return True
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Compile the Pi-hole custom.list.tsv into custom.list and apply it without restarting DNS")
+    subparsers = parser.add_subparsers(dest="command")
+    compileParser = subparsers.add_parser("compile", help="Validate the TSV and write the compiled custom.list")
+    compileParser.add_argument("tsv", type=str, help="custom.list.tsv")
+    compileParser.add_argument("--output", type=str, default="", help="Write the compiled list here instead of stdout")
+    applyParser = subparsers.add_parser("apply", help="Install a compiled or TSV list if it differs and reload pihole-FTL")
+    applyParser.add_argument("source", type=str, help="Compiled custom.list or custom.list.tsv")
+    applyParser.add_argument("--target", type=str, default=CUSTOM_LIST, help=f"List to replace (default {CUSTOM_LIST})")
+    applyParser.add_argument("--no-reload", action="store_true", help="Only replace the file")
+    args = parser.parse_args()
+
+    if not args.command:
+        parser.print_help()
+        exit(1)
+
+    try:
+        # Compiling is idempotent, so a compiled list can be passed to apply as well
+        content = compileTsv(args.tsv if args.command == "compile" else args.source)
+    except Exception as e:
+        LOGGER.error(str(e))
+        exit(1)
+
+    if args.command == "compile":
+        if args.output:
+            with open(args.output, "w") as f:
+                f.write(content)
+        else:
+            sys.stdout.write(content)
+        LOGGER.info(f"Compiled {len(content.splitlines())} records, sha256 {contentHash(content)}")
+    else:
+        changed = applyCustomList(content, args.target, None if args.no_reload else RELOAD_COMMAND)
+        print("changed" if changed else "unchanged")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+
+from datetime import datetime
+import argparse
+import ast
+import hashlib
+import ipaddress
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+#
+
+LOGGER = logging.getLogger("render-config")
+LOGGER.setLevel(logging.INFO)
+LOGGER.addHandler(logging.StreamHandler(stream=sys.stderr))
+
+# $NAME and ${NAME}, upper case only like the workflow variables, so regex anchors and
+# shell snippets inside the templates are left alone
+PLACEHOLDER = re.compile(r"\$(?:\{([A-Z_][A-Z0-9_]*)\}|([A-Z_][A-Z0-9_]*))")
+HOSTNAME = re.compile(r"^(?=.{1,253}$)([A-Za-z0-9]([A-Za-z0-9-]{0,61}[A-Za-z0-9])?)(\.[A-Za-z0-9]([A-Za-z0-9-]{0,61}[A-Za-z0-9])?)*$")
+TIMEZONE = re.compile(r"^[A-Za-z_]+(/[A-Za-z0-9_+-]+)*$")
+# Only the input hashes of renders that passed the rendered-file checks are cached, never
+# the rendered files, they hold the secrets of the runner environment
+RENDER_CACHE = os.getenv("RENDER_CACHE_DIR", os.path.expanduser("~/.cache/render-config"))
+CACHE_KEY = re.compile(r"^[0-9a-f]{64}$")
+
+def buildIndex(text):
+    # Placeholder -> line numbers where it is used
+    index = {}
+    for number, line in enumerate(text.splitlines(), 1):
+        for match in PLACEHOLDER.finditer(line):
+            index.setdefault(match.group(1) or match.group(2), []).append(number)
+    return index
+
+def isHostname(value):
+    return bool(HOSTNAME.match(value))
+
+def isIp(value, version=None):
+    try:
+        address = ipaddress.ip_address(value)
+    except ValueError:
+        return False
+    return version is None or address.version == version
+
+def isNetmask(value):
+    if not isIp(value, 4):
+        return False
+    bits = int(ipaddress.IPv4Address(value))
+    # contiguous ones followed by zeros
+    return bits != 0 and (((~bits) & 0xFFFFFFFF) + 1) & (~bits & 0xFFFFFFFF) == 0
+
+def isPythonStr(value):
+    try:
+        return ast.literal_eval(f"'{value}'") == value
+    except (SyntaxError, ValueError):
+        return False
+
+def isPythonStrList(value):
+    try:
+        items = ast.literal_eval(f"[{value}]")
+    except (SyntaxError, ValueError):
+        return False
+    return all(isinstance(item, str) for item in items)
+
+def isTimezone(value):
+    if not TIMEZONE.match(value):
+        return False
+    return not os.path.isdir("/usr/share/zoneinfo") or os.path.isfile(os.path.join("/usr/share/zoneinfo", value))
+
+VALIDATORS = {
+    "string": lambda value: True,
+    "secret": lambda value: True,
+    "int": lambda value: value.isdigit(),
+    "port": lambda value: value.isdigit() and 0 < int(value) < 65536,
+    "bool": lambda value: value in ("true", "false"),
+    "ipv4": lambda value: isIp(value, 4),
+    "ip": isIp,
+    "netmask": isNetmask,
+    "hostname": isHostname,
+    "host": lambda value: isIp(value) or isHostname(value),
+    "ntp": lambda value: isIp(value) or isHostname(value),
+    "timezone": isTimezone,
+    "path": lambda value: value.startswith("/"),
+    "python-str": isPythonStr,
+    "python-str-list": isPythonStrList,
+}
+
+def loadSchema(path):
+    # {"VARIABLE": {"type": "ipv4", "optional": false, "choices": [...], "min_length": 0,
+    #               "python_literal": false}, ...}
+    if not path:
+        return None
+    with open(path) as f:
+        schema = json.load(f)
+    unknown = {name: spec.get("type") for name, spec in schema.items() if spec.get("type", "string") not in VALIDATORS}
+    if unknown:
+        raise Exception(f"Unknown types in {path}: {unknown} at {datetime.now()}")
+    return schema
+
+def validate(name, value, spec):
+    kind = spec.get("type", "string")
+    shown = "***" if kind == "secret" else repr(value)
+    if value == "":
+        return None if spec.get("optional") else "is empty"
+    if "choices" in spec and value not in spec["choices"]:
+        return f"{shown} is not one of {', '.join(spec['choices'])}"
+    if len(value) < spec.get("min_length", 0):
+        return f"is shorter than {spec['min_length']} characters"
+    if not VALIDATORS[kind](value):
+        return f"{shown} is not a valid {kind}"
+    if spec.get("python_literal") and not isPythonStr(value):
+        return "cannot be placed inside a Python string literal"
+    return None
+
+def checkTemplate(path, text, schema, env):
+    # Every problem is reported at once, the provisioning run only starts with a clean template
+    index = buildIndex(text)
+    names = sorted(schema) if schema is not None else sorted(index)
+    errors = []
+    if schema is not None:
+        for name in sorted(set(index) - set(schema)):
+            LOGGER.info(f"{path}:{index[name][0]}: ${name} is not in the schema, left as is")
+        for name in sorted(set(schema) - set(index)):
+            errors.append(f"{path}: ${name} is in the schema but not used by the template")
+    values = {}
+    for name in names:
+        if name not in index:
+            continue
+        line = index[name][0]
+        if name not in env:
+            errors.append(f"{path}:{line}: ${name} is not set")
+            continue
+        problem = validate(name, env[name], schema.get(name, {}) if schema else {})
+        if problem:
+            errors.append(f"{path}:{line}: ${name} {problem}")
+        values[name] = env[name]
+    return values, errors
+
+def render(text, values):
+    return PLACEHOLDER.sub(lambda match: values.get(match.group(1) or match.group(2), match.group(0)), text)
+
+def checkRendered(path, rendered):
+    if path.endswith(".py"):
+        try:
+            compile(rendered, path, "exec")
+        except SyntaxError as e:
+            return [f"{path}:{e.lineno}: rendered file is not valid Python ({e.msg})"]
+    return []
+
+def cacheKey(text, schema, values):
+    digest = hashlib.sha256(text.encode())
+    digest.update(json.dumps(schema, sort_keys=True).encode())
+    digest.update(json.dumps(values, sort_keys=True).encode())
+    return digest.hexdigest()
+
+def removeCachedRenders():
+    # Rendered files cached by earlier versions, named by their key directly in RENDER_CACHE
+    for name in os.listdir(RENDER_CACHE):
+        if CACHE_KEY.match(name) and os.path.isfile(os.path.join(RENDER_CACHE, name)):
+            os.remove(os.path.join(RENDER_CACHE, name))
+
+def renderTemplate(path, schema_path=None, output=None, env=None, use_cache=True):
+    # Returns (input hash, cache hit). Raises with all validation errors. A hit skips the
+    # rendered-file checks, the template is still rendered from the environment.
+    with open(path) as f:
+        text = f.read()
+    schema = loadSchema(schema_path)
+    values, errors = checkTemplate(path, text, schema, os.environ if env is None else env)
+    if errors:
+        raise Exception("\n".join(errors))
+
+    key = cacheKey(text, schema, values)
+    validated = os.path.join(RENDER_CACHE, "validated", key)
+    rendered = render(text, values)
+    if use_cache and os.path.exists(validated):
+        LOGGER.info(f"{path}: inputs unchanged, validated before as {key[:12]}")
+        hit = True
+    else:
+        errors = checkRendered(path, rendered)
+        if errors:
+            raise Exception("\n".join(errors))
+        os.makedirs(os.path.dirname(validated), mode=0o700, exist_ok=True)
+        removeCachedRenders()
+        open(validated, "w").close()
+        hit = False
+    if output:
+        with open(output + ".tmp", "w") as f:
+            f.write(rendered)
+        shutil.copymode(output if os.path.exists(output) else path, output + ".tmp")
+        os.replace(output + ".tmp", output)
+        LOGGER.info(f"{path}: rendered {len(values)} variables to {output}")
+    return key, hit
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Render $VARIABLE templates from the environment with strict validation")
+    parser.add_argument("template", type=str, help="Template file")
+    parser.add_argument("--schema", type=str, default="", help="JSON schema of the template variables, defaults to <template>.schema.json when present")
+    parser.add_argument("--output", type=str, default="", help="Write the rendered file here")
+    parser.add_argument("--in-place", action="store_true", help="Overwrite the template with the rendered file")
+    parser.add_argument("--check", action="store_true", help="Only validate the environment against the template")
+    parser.add_argument("--index", action="store_true", help="Print the placeholders of the template with their line numbers as JSON")
+    parser.add_argument("--no-cache", action="store_true", help="Render even when the inputs match a cached render")
+    args = parser.parse_args()
+
+    if sum([bool(args.output), args.in_place, args.check, args.index]) != 1:
+        parser.print_help()
+        exit(1)
+
+    if args.index:
+        with open(args.template) as f:
+            print(json.dumps(buildIndex(f.read()), indent=2))
+        return
+
+    schema_path = args.schema or (args.template + ".schema.json" if os.path.exists(args.template + ".schema.json") else None)
+    output = args.template if args.in_place else args.output or None
+    try:
+        if args.check:
+            with open(args.template) as f:
+                text = f.read()
+            values, errors = checkTemplate(args.template, text, loadSchema(schema_path), os.environ)
+            if errors:
+                raise Exception("\n".join(errors))
+            errors = checkRendered(args.template, render(text, values))
+            if errors:
+                raise Exception("\n".join(errors))
+            LOGGER.info(f"{args.template}: {len(values)} variables valid")
+            return
+        key, hit = renderTemplate(args.template, schema_path, output, use_cache=not args.no_cache)
+    except Exception as e:
+        LOGGER.error(str(e))
+        exit(1)
+    print(key)
+
+if __name__ == "__main__":
+    main()